@@ -0,0 +1,46 @@
+import os
+
+try:
+    import psutil
+except ImportError:  # Optional: used to count physical cores
+    psutil = None
+
+
+def physical_cores() -> int:
+    """
+    Number of physical CPU cores. Hyper-threaded siblings share the same
+    matmul units, so compute-bound thread pools are sized by this number.
+
+    Returns:
+        int: The physical core count, or the logical count if it cannot be determined.
+    """
+    cores = psutil.cpu_count(logical=False) if psutil is not None else None
+    return cores or os.cpu_count() or 1
+
+
+def worker_processes() -> int:
+    """
+    Number of server worker processes sharing this host, as exported in
+    WEB_CONCURRENCY by app/run.py.
+
+    Returns:
+        int: The worker process count, at least 1.
+    """
+    return max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+
+
+def inference_threads(workers: int = None) -> int:
+    """
+    Threads each worker process uses for model inference and tokenization.
+    Physical cores are split between the worker processes so they do not
+    oversubscribe the CPU. INFERENCE_THREADS overrides the computed value.
+
+    Args:
+        workers (int): Number of worker processes; defaults to worker_processes().
+
+    Returns:
+        int: The per-process thread count, at least 1.
+    """
+    if "INFERENCE_THREADS" in os.environ:
+        return max(1, int(os.environ["INFERENCE_THREADS"]))
+    return max(1, physical_cores() // (workers or worker_processes()))
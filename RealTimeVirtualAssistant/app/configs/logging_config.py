@@ -1,4 +1,5 @@
 import logging
+import os
 from colorama import Fore, Style, init
 
 # Initialize colorama
@@ -18,6 +19,23 @@ class ColoredFormatter(logging.Formatter):
         message = super().format(record)
         return f"{color}{message}"
 
+# LOG_LEVEL is shared with uvicorn, which also accepts "trace"; the closest standard level is DEBUG
+_LEVEL_ALIASES = {"TRACE": "DEBUG"}
+
+def _log_level(name):
+    """
+    Resolve a level name such as "info" or "TRACE" to a logging level number.
+
+    Args:
+        name (str): The level name, in any case.
+
+    Returns:
+        int: The logging level, or None if the name is not a known level.
+    """
+    name = name.strip().upper()
+    level = logging.getLevelName(_LEVEL_ALIASES.get(name, name))
+    return level if isinstance(level, int) else None
+
 def setup_logger():
     logger = logging.getLogger("RealTimeVirtualAssistant")
 
@@ -28,6 +46,11 @@ def setup_logger():
         handler = logging.StreamHandler()
         handler.setFormatter(formatter)
 
-        logger.setLevel(logging.DEBUG)  # Adjust log level as needed
+        # Per-request detail is logged at DEBUG; set LOG_LEVEL=DEBUG to see it
+        level_name = os.environ.get("LOG_LEVEL", "INFO")
+        level = _log_level(level_name)
+        logger.setLevel(logging.INFO if level is None else level)
         logger.addHandler(handler)
+        if level is None:
+            logger.warning(f"Unknown LOG_LEVEL '{level_name}', logging at INFO.")
     return logger
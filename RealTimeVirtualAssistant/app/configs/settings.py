@@ -1,6 +1,120 @@
-# Placeholder for application settings
+import configparser
+import functools
+import os
+from dataclasses import dataclass, field
+from typing import ClassVar
+from app.configs.logging_config import setup_logger
+
+# Configure logger
+logger = setup_logger()
+
+CONFIG_PATH = "config/config.ini"
+
+
+@dataclass(frozen=True)
 class Settings:
-    APP_NAME = "RAG Framework Chatbot"
-    VERSION = "1.0.0"
+    """
+    Application settings, resolved once at startup from config/config.ini.
+    Values in the DEFAULT section can be overridden with environment variables
+    (see load_settings) so containers do not need a modified config file.
+    Server options (host, port, reload, log level) are read from the
+    environment by app/run.py.
+    """
+    APP_NAME: ClassVar[str] = "RAG Framework Chatbot"
+    VERSION: ClassVar[str] = "1.0.0"
+
+    text_length_limit: int
+    groq_key: str = field(repr=False)
+    groq_model: str
+    parameters: tuple
+    groq_max_concurrency: int
+    groq_requests_per_minute: int
+
+
+def _required(value, name: str):
+    """
+    Ensure a setting is present and non-empty.
+
+    Args:
+        value: The resolved setting value.
+        name (str): The setting name used in the error message.
+
+    Returns:
+        The value unchanged.
+    """
+    if not value:
+        logger.error(f"{name} is missing or empty.")
+        raise KeyError(f"{name} is missing or empty.")
+    return value
+
+
+def load_settings(config_path: str = CONFIG_PATH) -> Settings:
+    """
+    Read and validate the application settings from the config.ini file.
+    The TEXT_LENGTH_LIMIT, GROQ_API_KEY, MODEL_KEYWORD, KEYWORD_PARAMETERS,
+    GROQ_MAX_CONCURRENCY and GROQ_REQUESTS_PER_MINUTE environment variables
+    override the DEFAULT section.
+
+    Args:
+        config_path (str): Path of the config.ini file.
+
+    Returns:
+        Settings: The validated application settings.
+    """
+    try:
+        logger.info(f"Attempting to load configuration from {config_path}")
+
+        if not os.path.exists(config_path):
+            logger.error(f"Config file not found at {config_path}. Please create it and try again.")
+            raise FileNotFoundError(f"Config file not found at {config_path}.")
+
+        config = configparser.ConfigParser()
+        config.read(config_path)
+        default = config["DEFAULT"]
+
+        def env_or_default(env_var, key, fallback=""):
+            return os.environ.get(env_var, default.get(key, fallback)).strip()
+
+        parameters = tuple(
+            param.strip() for param in env_or_default("KEYWORD_PARAMETERS", "parameters").split(",") if param.strip()
+        )
+
+        settings = Settings(
+            text_length_limit=int(_required(env_or_default("TEXT_LENGTH_LIMIT", "text_length_limit"), "text_length_limit")),
+            groq_key=_required(env_or_default("GROQ_API_KEY", "key"), "API key"),
+            groq_model=_required(env_or_default("MODEL_KEYWORD", "model_keyword"), "Model"),
+            parameters=_required(parameters, "Parameters"),
+            groq_max_concurrency=int(env_or_default("GROQ_MAX_CONCURRENCY", "groq_max_concurrency", "4")),
+            groq_requests_per_minute=int(env_or_default("GROQ_REQUESTS_PER_MINUTE", "groq_requests_per_minute", "30")),
+        )
+
+        if settings.groq_max_concurrency < 1 or settings.groq_requests_per_minute < 1:
+            logger.error("Groq concurrency and rate limits must be positive.")
+            raise ValueError("Groq concurrency and rate limits must be positive.")
+
+        logger.info(f"Configuration loaded (model '{settings.groq_model}', parameters {list(settings.parameters)}).")
+        return settings
+
+    except FileNotFoundError as e:
+        logger.error(f"Configuration file error: {str(e)}")
+        raise
+    except KeyError as e:
+        logger.error(f"Configuration key error: {str(e)}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error while loading configuration: {str(e)}")
+        raise
+
+
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Get the process-wide Settings, loading them on first use.
+
+    Returns:
+        Settings: The shared application settings.
+    """
+    return load_settings()
+
 
-settings = Settings()
+settings = get_settings()
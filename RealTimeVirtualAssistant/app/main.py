@@ -1,12 +1,31 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from colorama import Fore, Style
-import pyfiglet
 from app.configs.logging_config import setup_logger
+from input_layer.embedding_generator import get_batching_embedder
+from app.services.ocr_service import get_ocr_executor
 from app.routers.routers import ocr_router, embedded_router
 
 # Configure logger
 logger = setup_logger()
 
+# Pre-rendered with pyfiglet.figlet_format("RAG Framework Chatbot")
+RAG_BANNER = r"""
+ ____      _    ____   _____                                            _
+|  _ \    / \  / ___| |  ___| __ __ _ _ __ ___   _____      _____  _ __| | __
+| |_) |  / _ \| |  _  | |_ | '__/ _` | '_ ` _ \ / _ \ \ /\ / / _ \| '__| |/ /
+|  _ <  / ___ \ |_| | |  _|| | | (_| | | | | | |  __/\ V  V / (_) | |  |   <
+|_| \_\/_/   \_\____| |_|  |_|  \__,_|_| |_| |_|\___| \_/\_/ \___/|_|  |_|\_\
+
+  ____ _           _   _           _
+ / ___| |__   __ _| |_| |__   ___ | |_
+| |   | '_ \ / _` | __| '_ \ / _ \| __|
+| |___| | | | (_| | |_| |_) | (_) | |_
+ \____|_| |_|\__,_|\__|_.__/ \___/ \__|
+"""
+
+
 class RAGFrameworkChatbot:
     """
     A class-based implementation for the RAG Framework Chatbot using FastAPI.
@@ -19,18 +38,42 @@ class RAGFrameworkChatbot:
         Sets up the FastAPI application and includes routers.
         """
         logger.info("Initializing the RAG Framework Chatbot application.")
-        self.app = FastAPI(title="RAG Framework Chatbot", version="1.0.0")
+        self.app = FastAPI(
+            title="RAG Framework Chatbot",
+            version="1.0.0",
+            lifespan=self._lifespan,
+            default_response_class=ORJSONResponse,  # Rust-backed JSON encoding for large float lists
+        )
         self._setup_ascii_banner()
         self._include_routers()
         logger.info("RAG Framework Chatbot application initialization complete.")
 
+    @staticmethod
+    @asynccontextmanager
+    async def _lifespan(app: FastAPI):
+        """
+        Warm up shared resources on startup so the first request does not pay for them.
+
+        Args:
+            app (FastAPI): The FastAPI application instance.
+        """
+        logger.info("Warming up the BERT model and starting the embedding batcher.")
+        embedder = get_batching_embedder()
+        embedder.start()
+        await embedder.warmup()
+        logger.info("BERT model warm-up complete.")
+        ocr_executor = get_ocr_executor()
+        yield
+        await embedder.stop()
+        ocr_executor.shutdown(cancel_futures=True)
+        get_ocr_executor.cache_clear()  # A later lifespan in this process gets a fresh pool
+
     def _setup_ascii_banner(self):
         """
         Display an ASCII banner for the RAG Framework Chatbot.
         """
         logger.info("Setting up the ASCII banner.")
-        ascii_banner = pyfiglet.figlet_format("RAG Framework Chatbot")
-        print(Fore.CYAN + ascii_banner + Style.RESET_ALL)
+        print(Fore.CYAN + RAG_BANNER + Style.RESET_ALL)
         logger.info("ASCII banner displayed.")
 
     def _include_routers(self):
@@ -1,41 +1,289 @@
-from transformers import BertTokenizer, BertModel
+import contextlib
+import functools
+import os
+import torch
+from app.configs.concurrency import inference_threads
+
+# Threads each worker process uses for inference (see inference_threads)
+INFERENCE_THREADS = inference_threads()
+
+# Let the Rust tokenizer split batched inputs across its thread pool, sized like the
+# torch pool. Must be set before tokenizers is imported; explicit values in the
+# environment win.
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+os.environ.setdefault("RAYON_NUM_THREADS", str(INFERENCE_THREADS))
+
+from huggingface_hub.constants import HF_HOME
+from transformers import AutoConfig, AutoTokenizer, BertModel
 from app.configs.logging_config import setup_logger
 
+try:
+    import intel_extension_for_pytorch as ipex
+except ImportError:  # Optional: only available on Intel builds
+    ipex = None
+
+try:
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTOptimizer, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig, OptimizationConfig
+except ImportError:  # Optional: only needed for the "onnx" backend
+    ORTModelForFeatureExtraction = None
+
 # Configure logger
 logger = setup_logger()
 
+# Name of the pre-trained model served by the embedding endpoints
+BERT_MODEL_NAME = 'bert-base-uncased'
+
+# Device the model runs on: "auto" (GPU when available), "cuda" or "cpu"
+EMBEDDING_DEVICE = os.environ.get("EMBEDDING_DEVICE", "auto").strip().lower()
+USE_CUDA = EMBEDDING_DEVICE != "cpu" and torch.cuda.is_available()
+
+# Model caches live next to the Hugging Face cache by default, outside the project tree
+_MODEL_CACHE_DIR = os.path.join(HF_HOME, "realtime-va")
+
+# Directory the torch weights are cached in for memory-mapped loading, one sub-directory per model
+TORCH_MODEL_DIR = os.environ.get("TORCH_MODEL_DIR", os.path.join(_MODEL_CACHE_DIR, "torch"))
+
+# Inference backend: "torch" (eager PyTorch) or "onnx" (ONNX Runtime via optimum)
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch").strip().lower()
+# Directory the exported ONNX graphs are cached in, one sub-directory per model
+ONNX_MODEL_DIR = os.environ.get("ONNX_MODEL_DIR", os.path.join(_MODEL_CACHE_DIR, "onnx"))
+# Apply dynamic int8 quantization on top of the optimized ONNX graph
+ONNX_QUANTIZE = os.environ.get("ONNX_QUANTIZE", "false").strip().lower() == "true"
+
+
+torch.set_num_threads(INFERENCE_THREADS)
+try:
+    # Each forward pass is a single chain of ops, so inter-op parallelism only adds contention
+    torch.set_num_interop_threads(1)
+except RuntimeError:  # Already set, or parallel work has already started in this process
+    pass
+torch.backends.mkldnn.enabled = True
+
 
 class BERTModel:
     """
     A class to manage the pre-trained BERT model and tokenizer.
     """
 
-    def __init__(self, model_name: str = 'bert-base-uncased'):
+    def __init__(self, model_name: str = BERT_MODEL_NAME, backend: str = EMBEDDING_BACKEND):
         """
         Initialize the BERT model and tokenizer.
 
         Args:
             model_name (str): The name of the pre-trained BERT model.
+            backend (str): The inference backend, "torch" or "onnx".
         """
         try:
-            logger.info(f"Loading pre-trained BERT model: {model_name}")
-            self.tokenizer = BertTokenizer.from_pretrained(model_name)
-            self.model = BertModel.from_pretrained(model_name)
+            logger.info(f"Loading pre-trained BERT model: {model_name} (backend={backend})")
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+            if not self.tokenizer.is_fast:
+                raise RuntimeError(f"No fast (Rust) tokenizer is available for {model_name}.")
+            self.device = "cpu"  # Device the model runs on; inputs are moved here
+            self.autocast_dtype = None  # Reduced precision used for forward passes, if any
+            self.static_shapes = False  # Whether batches must be padded to fixed sizes (compiled CUDA graphs)
+
+            if backend == "onnx" and ORTModelForFeatureExtraction is None:
+                logger.warning("optimum[onnxruntime] is not installed, falling back to the torch backend.")
+                backend = "torch"
+
+            if backend == "onnx":
+                self.model = self._load_onnx_model(model_name)
+                if self.model.providers[0] == "CUDAExecutionProvider":
+                    self.device = "cuda"
+            else:
+                self.model = self._load_torch_model(model_name).eval()
+                if EMBEDDING_DEVICE == "cuda" and not USE_CUDA:
+                    logger.warning("EMBEDDING_DEVICE=cuda but no GPU is available, running on the CPU.")
+                if USE_CUDA:
+                    self._optimize_for_cuda()
+                else:
+                    self._optimize_for_cpu()
             logger.info("BERT model and tokenizer loaded successfully.")
         except Exception as e:
             logger.error(f"Failed to initialize BERT model: {str(e)}")
             raise e
 
+    @staticmethod
+    def _load_torch_model(model_name: str) -> BertModel:
+        """
+        Load the model with its weights memory-mapped from a cached checkpoint.
+        The checkpoint is written under TORCH_MODEL_DIR on first use. Later loads map
+        it read-only instead of copying it, so every worker process on the host
+        shares the same page-cache copy of the weights and startup skips both the
+        random initialization and the copy. If the checkpoint cannot be written,
+        the regular from_pretrained model is used instead.
+
+        Args:
+            model_name (str): The name of the pre-trained BERT model.
+
+        Returns:
+            BertModel: The model, with parameters backed by the mapped file when possible.
+        """
+        save_dir = os.path.join(TORCH_MODEL_DIR, model_name)
+        weights_path = os.path.join(save_dir, "model.pt")
+
+        if not os.path.exists(weights_path):
+            logger.info(f"Caching {model_name} weights in {weights_path}.")
+            pretrained = BertModel.from_pretrained(model_name)
+            # Non-persistent buffers (e.g. position_ids) are saved too so none are left on the meta device
+            tensors = {**dict(pretrained.named_buffers()), **pretrained.state_dict()}
+            # Write then rename, so workers starting together never map a partial file
+            temp_path = f"{weights_path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(save_dir, exist_ok=True)
+                torch.save(tensors, temp_path)
+                os.replace(temp_path, weights_path)
+            except OSError as e:
+                logger.warning(f"Could not cache weights in {weights_path}, loading without mmap: {str(e)}")
+                with contextlib.suppress(OSError):
+                    os.remove(temp_path)
+                return pretrained
+            del pretrained, tensors
+
+        tensors = torch.load(weights_path, map_location="cpu", mmap=True, weights_only=True)
+        with torch.device("meta"):
+            model = BertModel(AutoConfig.from_pretrained(model_name))
+        result = model.load_state_dict(tensors, strict=False, assign=True)
+        if result.missing_keys:
+            raise RuntimeError(f"Cached weights in {weights_path} are missing {result.missing_keys}.")
+        for name in result.unexpected_keys:
+            module_name, _, buffer_name = name.rpartition(".")
+            model.get_submodule(module_name).register_buffer(buffer_name, tensors[name], persistent=False)
+
+        logger.info(f"Loaded memory-mapped BERT weights from {weights_path}")
+        return model
+
+    @staticmethod
+    def _load_onnx_model(model_name: str):
+        """
+        Load the model as an optimized ONNX Runtime graph, exporting it on first use.
+        The exported graph is cached under ONNX_MODEL_DIR and reused on later starts.
+        If the cache cannot be written, the model is exported in memory and served
+        without the offline graph optimization and quantization.
+
+        Args:
+            model_name (str): The name of the pre-trained BERT model.
+
+        Returns:
+            ORTModelForFeatureExtraction: The ONNX Runtime model.
+        """
+        save_dir = os.path.join(ONNX_MODEL_DIR, model_name)
+        optimized_file = "model_optimized.onnx"
+        quantized_file = "model_optimized_quantized.onnx"
+        file_name = quantized_file if ONNX_QUANTIZE else optimized_file
+
+        session_options = ort.SessionOptions()
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session_options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        session_options.intra_op_num_threads = INFERENCE_THREADS
+        session_options.inter_op_num_threads = 1
+        provider = "CPUExecutionProvider"
+        if USE_CUDA:
+            if "CUDAExecutionProvider" in ort.get_available_providers():
+                provider = "CUDAExecutionProvider"
+            else:
+                logger.warning("onnxruntime has no CUDA support (install onnxruntime-gpu), running on the CPU.")
+
+        if not os.path.exists(os.path.join(save_dir, file_name)):
+            try:
+                if not os.path.exists(os.path.join(save_dir, optimized_file)):
+                    logger.info(f"Exporting {model_name} to ONNX in {save_dir}.")
+                    exported = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+                    optimizer = ORTOptimizer.from_pretrained(exported)
+                    optimizer.optimize(
+                        save_dir=save_dir, optimization_config=OptimizationConfig(optimization_level=99)
+                    )
+
+                if ONNX_QUANTIZE:
+                    logger.info("Applying dynamic int8 quantization to the ONNX graph.")
+                    quantizer = ORTQuantizer.from_pretrained(save_dir, file_name=optimized_file)
+                    quantizer.quantize(
+                        save_dir=save_dir,
+                        quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False),
+                    )
+            except OSError as e:
+                logger.warning(f"Could not cache the ONNX graph in {save_dir}, exporting in memory: {str(e)}")
+                return ORTModelForFeatureExtraction.from_pretrained(
+                    model_name, export=True, provider=provider, session_options=session_options
+                )
+
+        logger.info(f"Loading ONNX Runtime model from {os.path.join(save_dir, file_name)} ({provider})")
+        return ORTModelForFeatureExtraction.from_pretrained(
+            save_dir, file_name=file_name, provider=provider, session_options=session_options
+        )
+
+    def _optimize_for_cuda(self):
+        """
+        Move the model to the GPU in half precision and compile it with TorchInductor.
+        BF16 is used on GPUs that support it (Ampere and newer) since it keeps the
+        FP32 exponent range, FP16 otherwise. mode="reduce-overhead" replays CUDA
+        graphs, which removes most per-call kernel launch overhead. Every new input
+        shape costs a graph capture, so batches are padded to fixed sizes
+        (static_shapes) and the model must always be called from the same thread.
+        """
+        self.device = "cuda"
+        self.static_shapes = True
+        self.autocast_dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        self.model = torch.compile(self.model.to(self.device, dtype=self.autocast_dtype), mode="reduce-overhead")
+        logger.info(f"BERT model moved to CUDA ({self.autocast_dtype}) and compiled with torch.compile.")
+
+    def _optimize_for_cpu(self):
+        """
+        Switch the model to BF16 inference when the CPU can run it natively.
+        Uses ipex.fast_bert fused kernels when intel_extension_for_pytorch is
+        installed, otherwise falls back to plain BF16 autocast.
+        """
+        if ipex is not None:
+            try:
+                self.model = ipex.fast_bert(self.model, dtype=torch.bfloat16)
+                self.autocast_dtype = torch.bfloat16
+                logger.info("BERT model optimized with ipex.fast_bert (bfloat16).")
+                return
+            except Exception as e:
+                logger.warning(f"ipex.fast_bert unavailable, falling back to autocast: {str(e)}")
+
+        try:
+            use_bf16 = torch.ops.mkldnn._is_mkldnn_bf16_supported()
+        except (AttributeError, RuntimeError):
+            use_bf16 = False
+        self.autocast_dtype = torch.bfloat16 if use_bf16 else None
+        logger.info(f"BERT inference dtype: {'bfloat16' if use_bf16 else 'float32'}")
+
+    @contextlib.contextmanager
+    def inference_context(self):
+        """
+        Context manager to run forward passes under: inference mode plus
+        autocast to the reduced precision chosen for the device, if any.
+        """
+        if self.autocast_dtype is None:
+            with torch.inference_mode():
+                yield
+        else:
+            with torch.inference_mode(), torch.autocast(self.device, dtype=self.autocast_dtype):
+                yield
+
     def get_tokenizer(self):
         """
         Get the tokenizer instance.
         """
-        logger.info("Retrieving BERT tokenizer instance.")
         return self.tokenizer
 
     def get_model(self):
         """
         Get the model instance.
         """
-        logger.info("Retrieving BERT model instance.")
         return self.model
+
+
+@functools.lru_cache(maxsize=1)
+def get_bert() -> BERTModel:
+    """
+    Get the process-wide BERTModel instance, loading it on first use.
+    Usable directly or as a FastAPI dependency.
+
+    Returns:
+        BERTModel: The shared BERTModel instance.
+    """
+    return BERTModel()
@@ -1,11 +1,20 @@
-from typing import List
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 
 
 # Model for the query input (for /generate-embeddings)
 class TextModel(BaseModel):
     text: str
+    # "float" returns a JSON list of floats; "float16" and "int8" return a compact base64 buffer
+    encoding_format: Literal["float", "float16", "int8"] = "float"
 
 # Model for the embedding output (for /generate-embeddings response)
 class EmbeddingModel(BaseModel):
     text_embeddings: List[float]
+
+# Model for a base64-encoded embedding (for /generate-embeddings with encoding_format float16/int8)
+class EncodedEmbeddingModel(BaseModel):
+    embedding_b64: str
+    dtype: str
+    dim: int
+    scale: Optional[float] = None  # int8 only: value = int8 * scale
@@ -1,20 +1,21 @@
-import configparser
-import os
+import asyncio
+import numpy as np
 from colorama import Fore, Style
-import pyfiglet
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
 
 from app.models.models import (
     TextModel
 )
 
-from app.services.ocr_service import ImageTextExtractor
+from app.services.ocr_service import run_ocr
 from app.services.extract_keywords_service import KeywordExtractor
 from app.services.extract_keywords_service import ConfigurationManagerForKeywords
+from app.services.cache_service import ResponseCache, content_hash
 
-from app.models.BERTModel import BERTModel
-from input_layer.embedding_generator import TextEmbedder
+from input_layer.embedding_generator import BatchingEmbedder, encode_embedding, get_batching_embedder
 from app.configs.logging_config import setup_logger
+from app.configs.settings import settings
 
 
 
@@ -31,43 +32,67 @@ logger = setup_logger()
     Resolves the user query using the retrieved documents.
 """
 
+# Pre-rendered with pyfiglet.figlet_format("API Service")
+API_BANNER = r"""
+    _    ____ ___   ____                  _
+   / \  |  _ \_ _| / ___|  ___ _ ____   _(_) ___ ___
+  / _ \ | |_) | |  \___ \ / _ \ '__\ \ / / |/ __/ _ \
+ / ___ \|  __/| |   ___) |  __/ |   \ V /| | (_|  __/
+/_/   \_\_|  |___| |____/ \___|_|    \_/ |_|\___\___|
+"""
+
 logger.info("Setting up the ASCII banner for routers.")
-ascii_banner = pyfiglet.figlet_format("API Service")
-print(Fore.CYAN + ascii_banner + Style.RESET_ALL)
+print(Fore.CYAN + API_BANNER + Style.RESET_ALL)
 logger.info("ASCII banner displayed.")
 
-def load_config():
+# Maximum accepted length of /generate-embeddings input, read once at import time
+TEXT_LENGTH_LIMIT = settings.text_length_limit
+
+# Both endpoints are deterministic functions of their input, so repeated
+# requests are answered from these caches
+_EMBEDDING_CACHE = ResponseCache(maxsize=4096, ttl_seconds=3600)
+_OCR_CACHE = ResponseCache(maxsize=1024, ttl_seconds=3600)
+# OCR output alone, keyed by the same image hash, so a retry after a failed
+# keyword extraction does not run Tesseract again
+_EXTRACTED_TEXT_CACHE = ResponseCache(maxsize=1024, ttl_seconds=3600)
+
+# Accepted upload types (you may extend these for allowed formats)
+_ALLOWED_MIME_TYPES = frozenset({"image/jpeg", "image/png", "image/bmp", "image/tiff"})
+_ALLOWED_EXTENSIONS = frozenset({"jpg", "jpeg", "png", "bmp", "tiff"})
+
+def _read_upload(src) -> tuple:
     """
-    Load configuration from the config.ini file.
+    Read an uploaded file into a single bytes object and hash it.
+    The bytes are what gets sent to the OCR process pool, so this is the only copy.
+    Meant to run in a worker thread, since the read is blocking.
+
+    Args:
+        src: The raw binary file object of the upload.
+
+    Returns:
+        tuple: (the file content as bytes, its content_hash cache key)
     """
-    try:
-        config_path = "config/config.ini"
-        logger.info(f"Attempting to load configuration from {config_path}")
-
-        if not os.path.exists(config_path):
-            logger.error(f"Config file not found at {config_path}. Please create it and try again.")
-            raise FileNotFoundError(f"Config file not found at {config_path}.")
-
-        config = configparser.ConfigParser()
-        config.read(config_path)
-
-        # Retrieve API key and initialize the client
-        text_length_limit = config["DEFAULT"].getint("text_length_limit", "")
-        if not text_length_limit:
-            logger.error("text_length_limit is missing or empty.")
-            raise KeyError("text_length_limit is missing or empty.")
-        logger.info("text_length_limit successfully loaded.")
-        return text_length_limit
-
-    except FileNotFoundError as e:
-        logger.error(f"Configuration file error: {str(e)}")
-        raise
-    except KeyError as e:
-        logger.error(f"Configuration key error: {str(e)}")
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error while loading configuration: {str(e)}")
-        raise
+    src.seek(0)
+    data = src.read()
+    return data, content_hash(data)
+
+
+def _format_embeddings(embeddings: np.ndarray, encoding_format: str):
+    """
+    Shape embeddings for the response according to the requested encoding.
+
+    Args:
+        embeddings (np.ndarray): The float32 embedding.
+        encoding_format (str): "float", "float16" or "int8".
+
+    Returns:
+        The array itself for "float" (serialized by orjson as a list of floats),
+        otherwise an EncodedEmbeddingModel-shaped dict.
+    """
+    if encoding_format == "float":
+        return embeddings
+    return encode_embedding(embeddings, encoding_format)
+
 
 ocr_router = APIRouter()
 embedded_router = APIRouter()
@@ -91,29 +116,53 @@ async def upload_image(file: UploadFile = File(...), query: str = Form(...)):
             - keywords: Keywords extracted from the image text.
     """
     try:
-        logger.info("Received an image and a query for OCR processing.")
-        logger.debug(f"Query received: {query}")
+        logger.debug("Received an image and a query for OCR processing. Query: %s", query)
 
         if not file.filename:
             logger.error("No file was uploaded.")
             raise HTTPException(status_code=400, detail="No file uploaded.")
 
-        # Validate file type (you may extend this for allowed formats)
-        allowed_extensions = {".jpg", ".jpeg", ".png", ".bmp", ".tiff"}
-        file_extension = file.filename.split(".")[-1].lower()
+        # Validate file type from the multipart content type, falling back to the
+        # file extension for generic or non-standard types (e.g. image/jpg, image/x-png)
+        file_type_allowed = (
+            file.content_type in _ALLOWED_MIME_TYPES
+            or file.filename.rsplit(".", 1)[-1].lower() in _ALLOWED_EXTENSIONS
+        )
 
-        if f".{file_extension}" not in allowed_extensions:
-            logger.error(f"Unsupported file format: {file_extension}")
+        if not file_type_allowed:
+            logger.error("Unsupported file format: %s (%s)", file.filename, file.content_type)
             raise HTTPException(status_code=400, detail="Unsupported file format. Please upload an image.")
 
-        # Extract text from the image
+        # Read and hash the upload, then serve repeated images from the cache
+        image_bytes, cache_key = await asyncio.to_thread(_read_upload, file.file)
+        # The bytes are the only copy still needed; release the spooled upload now
+        await file.close()
+        cached = _OCR_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info("OCR result served from cache.")
+            return {"image_text": cached["image_text"], "query": query, "keywords": cached["keywords"]}
+
+        # Load the keyword extraction configuration; it only reads the resolved settings
+        # and the shared Groq client, so it runs inline rather than alongside OCR
         try:
-            logger.info("Initializing the ImageTextExtractor Class.")
-            extractor = ImageTextExtractor(file)
+            config_keywords = ConfigurationManagerForKeywords()
+            config_keywords.load_config()
+        except Exception as e:
+            logger.error(f"Failed to load keyword extraction configuration: {str(e)}", exc_info=True)
+            raise HTTPException(status_code=500, detail="Error loading keyword extraction configuration.")
 
-            logger.info("Extracting text from the image.")
-            extracted_data = extractor.extract_text_from_image()
-            logger.debug("Extracted text completed")
+        # Extract text from the image in the OCR process pool, so concurrent
+        # uploads use separate cores and the event loop stays free
+        try:
+            extracted_data = _EXTRACTED_TEXT_CACHE.get(cache_key)
+            if extracted_data is None:
+                logger.debug("Extracting text from the image.")
+                extracted_data = await run_ocr(image_bytes)
+                del image_bytes
+                if "error" not in extracted_data:
+                    _EXTRACTED_TEXT_CACHE.set(cache_key, extracted_data)
+            else:
+                logger.debug("Extracted text served from cache.")
 
             if not extracted_data:
                 logger.warning("No text extracted from the image.")
@@ -123,33 +172,22 @@ async def upload_image(file: UploadFile = File(...), query: str = Form(...)):
             logger.error(f"Failed to extract text from the image: {str(e)}", exc_info=True)
             raise HTTPException(status_code=500, detail="Error extracting text from the image.")
 
-        # Load keyword extraction configuration
-        try:
-            logger.info("Initializing the ConfigurationManagerForKeywords Class.")
-            config_keywords = ConfigurationManagerForKeywords()
-
-            logger.info("Loading configuration for keyword extraction.")
-            config_keywords.load_config()
-
-        except Exception as e:
-            logger.error(f"Failed to load keyword extraction configuration: {str(e)}", exc_info=True)
-            raise HTTPException(status_code=500, detail="Error loading keyword extraction configuration.")
-
         # Extract keywords
         try:
-            logger.info("Extracting keywords from the extracted text.")
+            logger.debug("Extracting keywords from the extracted text.")
             keyword_extractor = KeywordExtractor(extracted_data, config_keywords)
-            keywords = keyword_extractor._extract_keywords()
+            keywords = await keyword_extractor._extract_keywords()
             if not keywords:
                 logger.warning("No keywords extracted.")
                 raise HTTPException(status_code=422, detail="No keywords found in the extracted text.")
-            logger.debug(f"Extracted keywords: {keywords}")
+            logger.debug("Extracted keywords: %s", keywords)
 
         except Exception as e:
             logger.error(f"Keyword extraction failed: {str(e)}", exc_info=True)
             raise HTTPException(status_code=500, detail="Error extracting keywords.")
 
         logger.info("OCR processing completed successfully.")
+        _OCR_CACHE.set(cache_key, {"image_text": extracted_data, "keywords": keywords})
 
         # Return the response with extracted text and keywords
         return {
@@ -168,67 +206,55 @@ async def upload_image(file: UploadFile = File(...), query: str = Form(...)):
         raise HTTPException(status_code=500, detail="Internal server error during image processing.")
 
 @embedded_router.post("/generate-embeddings", summary="Generate embeddings for text.")
-async def generate_embeddings(text: TextModel):
+async def generate_embeddings(text: TextModel, embedder: BatchingEmbedder = Depends(get_batching_embedder)):
     """
     Generate embeddings for the given text using BERT and return the result.
+    Concurrent requests are batched into shared forward passes.
 
     Args:
-        text (TextModel): The input text model containing the text to be embedded.
+        text (TextModel): The input text model containing the text to be embedded
+            and the response encoding ("float", or base64 "float16" / "int8").
+        embedder (BatchingEmbedder): The shared batching embedder.
 
     Returns:
-        dict: A dictionary containing either the embeddings or an error message.
+        A JSON response containing either the embeddings or an error message.
+        Embeddings are returned as an ORJSONResponse so the NumPy array is
+        serialized by orjson directly instead of going through jsonable_encoder.
     """
     try:
-        logger.info(f"Received request to generate embeddings for text: {text.text}")
+        logger.debug("Received request to generate embeddings for %d characters of text.", len(text.text))
 
         # Validate input text
         if not text.text or not text.text.strip():
             logger.warning("Received empty or invalid text input.")
             raise HTTPException(status_code=400, detail="Input text cannot be empty.")
         # Validate input text length
-        text_length_limit=load_config()
-        if len(text.text) >  text_length_limit:
-            logger.warning(f"Text input exceeds allowed limit: {len(text.text)} characters.")
-            raise HTTPException(status_code=400, detail="Text input is too long. Maximum length is 10,000 characters.")
-
-        try:
-            # Initialize the BERT model
-            logger.info("Initializing BERT model for embedding generation.")
-            bert_model = BERTModel()
-            logger.info("BERT model initialized successfully.")
-        except Exception as model_error:
-            logger.critical(f"Failed to load BERT model: {str(model_error)}", exc_info=True)
-            raise HTTPException(status_code=500, detail="Error loading BERT model.") from model_error
-
-        try:
-            # Initialize the TextEmbedder
-            logger.info("Initializing TextEmbedder.")
-            text_embedder = TextEmbedder(bert_model)
-            logger.info("TextEmbedder initialized successfully.")
-        except Exception as embedder_error:
-            logger.critical(f"Failed to initialize TextEmbedder: {str(embedder_error)}", exc_info=True)
-            raise HTTPException(status_code=500, detail="Error initializing text embedder.") from embedder_error
+        if len(text.text) > TEXT_LENGTH_LIMIT:
+            logger.warning("Text input exceeds allowed limit: %d characters.", len(text.text))
+            raise HTTPException(
+                status_code=400, detail=f"Text input is too long. Maximum length is {TEXT_LENGTH_LIMIT:,} characters."
+            )
+
+        cache_key = content_hash(text.text.encode())
+        cached = _EMBEDDING_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info("Embeddings served from cache.")
+            return ORJSONResponse({"generated_embeddings": _format_embeddings(cached, text.encoding_format)})
 
         try:
             # Generate embeddings
-            logger.info("Generating embeddings for the given text.")
-            generated_embeddings = text_embedder._generate_text_embeddings(text.text)
-
-            # Validate the generated embeddings
-            if not isinstance(generated_embeddings, list):
-                logger.error("Generated embeddings are not a list.")
-                raise HTTPException(status_code=500, detail="Generated embeddings must be a list.")
-
-            if not all(isinstance(value, float) for value in generated_embeddings):
-                logger.error("Generated embeddings contain non-float values.")
-                raise HTTPException(status_code=500, detail="Generated embeddings must be a list of floats.")
+            generated_embeddings = await embedder.submit(text.text)
 
+            # TextEmbedder always returns a float32 array; only emptiness needs checking
             if len(generated_embeddings) == 0:
                 logger.warning("Generated embeddings are empty.")
                 raise HTTPException(status_code=422, detail="Generated embeddings are empty.")
 
-            logger.info("Embeddings generated and validated successfully.")
-            return {"generated_embeddings": generated_embeddings}
+            logger.info("Embeddings generated successfully.")
+            _EMBEDDING_CACHE.set(cache_key, generated_embeddings)
+            return ORJSONResponse(
+                {"generated_embeddings": _format_embeddings(generated_embeddings, text.encoding_format)}
+            )
 
         except Exception as embedding_error:
             logger.error(f"Error during embedding generation: {str(embedding_error)}", exc_info=True)
@@ -1,40 +1,50 @@
 import os
 import sys
-import configparser
 import uvicorn
 from app.configs.logging_config import setup_logger
 
 # Setup logger
 logger = setup_logger()
 
-# Load configuration with error handling
-config = configparser.ConfigParser()
+# Log levels uvicorn accepts
+UVICORN_LOG_LEVELS = ("critical", "error", "warning", "info", "debug", "trace")
 
+# Read server settings from the environment, with defaults matching the container setup
 try:
-    config_path = "config/config.ini"
-    logger.info(f"Attempting to load configuration from {config_path}")
-
-    if not os.path.exists(config_path):
-        logger.error(f"Config file not found at {config_path}. Please create it and try again.")
-        raise FileNotFoundError(f"Config file not found at {config_path}.")
-
-    config = configparser.ConfigParser()
-    config.read(config_path)
-
-    # Read server settings with error handling
-    HOST = config["server"].get("host", "").strip()
-    PORT = config["server"].getint("port", "")
-    RELOAD = config["server"].getboolean("reload", "")
-    LOGLEVEL = config["server"].get("loglevel", "").strip()
-
-except (configparser.Error, ValueError, KeyError) as config_error:
+    HOST = os.environ.get("HOST", "0.0.0.0").strip()
+    PORT = int(os.environ.get("PORT", "9001"))
+    RELOAD = os.environ.get("RELOAD", "false").strip().lower() in ("1", "true", "yes")
+    # Same variable as the application logger (see logging_config), so one setting controls both
+    LOGLEVEL = os.environ.get("LOG_LEVEL", "info").strip().lower()
+    if LOGLEVEL not in UVICORN_LOG_LEVELS:
+        logger.warning(f"Unknown LOG_LEVEL '{LOGLEVEL}' for the server, using 'info'.")
+        LOGLEVEL = "info"
+
+    # uvloop and httptools are the fastest event loop / HTTP parser; uvloop is not available on Windows
+    LOOP = "asyncio" if sys.platform == "win32" else "uvloop"
+    HTTP = "httptools"
+    # One worker per core in production; the reloader only supports a single process
+    WORKERS = 1 if RELOAD else int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+    # Exported so each worker can split the CPU cores between its inference threads
+    os.environ["WEB_CONCURRENCY"] = str(WORKERS)
+
+except ValueError as config_error:
     logger.critical(f"Error reading configuration: {str(config_error)}", exc_info=True)
     sys.exit(1)
 
 def main():
     try:
-        logger.info(f"Starting FastAPI app on {HOST}:{PORT} (reload={RELOAD})")
-        uvicorn.run("app.main:app", host=HOST, port=PORT, reload=RELOAD, log_level=LOGLEVEL)
+        logger.info(f"Starting FastAPI app on {HOST}:{PORT} (reload={RELOAD}, workers={WORKERS})")
+        uvicorn.run(
+            "app.main:app",
+            host=HOST,
+            port=PORT,
+            reload=RELOAD,
+            workers=WORKERS,
+            loop=LOOP,
+            http=HTTP,
+            log_level=LOGLEVEL,
+        )
     except Exception as e:
         logger.critical(f"Failed to start the FastAPI app: {str(e)}", exc_info=True)
         sys.exit(1)
@@ -0,0 +1,81 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from app.configs.logging_config import setup_logger
+
+# Configure logger
+logger = setup_logger()
+
+
+def content_hash(data: bytes) -> bytes:
+    """
+    Compute a compact content hash suitable for use as a cache key.
+
+    Args:
+        data (bytes): The content to hash.
+
+    Returns:
+        bytes: A 16-byte BLAKE2b digest of the content.
+    """
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class ResponseCache:
+    """
+    A thread-safe in-process LRU cache with a per-entry time-to-live.
+    Used to short-circuit deterministic endpoints on repeated inputs.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl_seconds: float = 3600):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept; the least recently used is evicted first.
+            ttl_seconds (float): How long an entry stays valid after it is stored.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Look up a key, refreshing its recency on a hit.
+
+        Args:
+            key: The cache key.
+            default: Value returned on a miss or an expired entry.
+
+        Returns:
+            The cached value, or default.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """
+        Store a value, evicting the least recently used entries beyond maxsize.
+
+        Args:
+            key: The cache key.
+            value: The value to store.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
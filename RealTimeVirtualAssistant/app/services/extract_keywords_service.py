@@ -1,17 +1,141 @@
-import os
-import configparser
-from groq import Groq
+import asyncio
+import functools
+import time
+from collections import defaultdict
+from groq import Groq, APIConnectionError, InternalServerError, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 from app.configs.logging_config import setup_logger
+from app.configs.settings import settings
+from app.services.cache_service import ResponseCache, content_hash
 from app.prompts.prompt import get_keyword_prompt
 
 # Configure logger
 logger = setup_logger()
 
 
+class AsyncRateLimiter:
+    """
+    A token-bucket rate limiter for asyncio code.
+    Allows short bursts up to the bucket size while capping the sustained rate.
+    """
+
+    def __init__(self, requests_per_minute: int, burst: int = 1):
+        """
+        Initialize the rate limiter with a full bucket.
+
+        Args:
+            requests_per_minute (int): Sustained number of acquisitions allowed per minute.
+            burst (int): Bucket size, i.e. how many acquisitions may happen back to back.
+        """
+        self.rate = requests_per_minute / 60
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        # Created on first use: on Python 3.9 an asyncio.Lock binds to the loop current at
+        # creation, which for an import-time instance is not the worker's serving loop
+        self._lock = None
+
+    async def acquire(self):
+        """
+        Wait until a token is available and consume it.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# Common English words that never make useful keywords on their own
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is",
+    "it", "its", "of", "on", "or", "that", "the", "this", "to", "was", "were", "will", "with",
+})
+
+# Parameter holding the recognized text of each OCR word (the others are layout values)
+WORD_PARAMETER = "word"
+
+# Keywords previously returned by Groq, keyed by the hash of the prompt's word list
+_KEYWORD_CACHE = ResponseCache(maxsize=1024, ttl_seconds=3600)
+
+# Cap the sustained rate of Groq calls per process (see also _groq_semaphore)
+_GROQ_LIMITER = AsyncRateLimiter(settings.groq_requests_per_minute, burst=settings.groq_max_concurrency)
+
+
+@functools.lru_cache(maxsize=1)
+def _groq_semaphore() -> asyncio.Semaphore:
+    """
+    Get the semaphore capping in-flight Groq calls per process, creating it on first use.
+    Created lazily so that, on Python 3.9, it binds to the serving event loop rather
+    than to whichever loop was current at import (e.g. the gunicorn master's).
+
+    Returns:
+        asyncio.Semaphore: The shared semaphore.
+    """
+    return asyncio.Semaphore(settings.groq_max_concurrency)
+
+
+@retry(
+    retry=retry_if_exception_type((RateLimitError, APIConnectionError, InternalServerError)),
+    wait=wait_exponential(min=0.5, max=8),
+    stop=stop_after_attempt(3),
+    reraise=True,
+)
+async def _create_chat_completion(client, **kwargs):
+    """
+    Call the Groq chat completions API without blocking the event loop.
+    Calls are limited by _groq_semaphore and _GROQ_LIMITER, and retried with
+    exponential backoff on rate limiting and transient server errors.
+
+    Args:
+        client (Groq): The Groq API client.
+        **kwargs: Arguments forwarded to client.chat.completions.create.
+
+    Returns:
+        ChatCompletion: The Groq API response.
+    """
+    async with _groq_semaphore():
+        await _GROQ_LIMITER.acquire()
+        return await asyncio.to_thread(client.chat.completions.create, **kwargs)
+
+
+@functools.lru_cache(maxsize=1)
+def get_groq_client() -> Groq:
+    """
+    Get the process-wide Groq client, creating it on first use.
+    Sharing one client reuses its HTTP connection pool (and TLS sessions)
+    across requests.
+
+    Returns:
+        Groq: The shared Groq API client.
+    """
+    try:
+        logger.info("Initializing Groq client.")
+        # Retries are handled by _create_chat_completion so backoff is applied once
+        client = Groq(api_key=settings.groq_key, max_retries=0)
+        logger.info("Groq client initialized successfully.")
+        return client
+    except Exception as e:
+        error_message = (
+            "Failed to initialize Groq client. Please ensure the API key is valid, "
+            "your network connection is active, and the Groq service is reachable. "
+            f"Error details: {e}"
+        )
+        logger.error(error_message)
+        raise RuntimeError(error_message)
+
+
 class ConfigurationManagerForKeywords:
     """
-    A class to manage configuration and Groq client initialization.
-    Encapsulates parameters, model, and client details.
+    A class to manage keyword extraction configuration.
+    Encapsulates parameters and model details; the Groq client is shared
+    process-wide through get_groq_client().
     """
 
     def __init__(self):
@@ -20,79 +144,16 @@ class ConfigurationManagerForKeywords:
         """
         self.parameters = []  # List of parameters to extract from the image text
         self.model = None  # Model name for Groq API
-        self.client = None  # Groq API client instance
-        logger.info("ConfigurationManager initialized.")
+        logger.debug("ConfigurationManager initialized.")
 
     def load_config(self):
         """
-        Load configuration from the config.ini file.
+        Load the application settings and make sure the shared Groq client exists.
         Ensures that the API key, model, and parameters are properly set.
         """
-        try:
-            config_path = "config/config.ini"
-            logger.info(f"Attempting to load configuration from {config_path}")
-
-            if not os.path.exists(config_path):
-                logger.error(f"Config file not found at {config_path}. Please create it and try again.")
-                raise FileNotFoundError(f"Config file not found at {config_path}.")
-
-            config = configparser.ConfigParser()
-            config.read(config_path)
-
-            # Retrieve API key and initialize the client
-            api_key = config["DEFAULT"].get("key", "").strip()
-            if not api_key:
-                logger.error("API key is missing or empty.")
-                raise KeyError("API key is missing or empty.")
-            logger.info("API key successfully loaded.")
-            self._initialize_groq(api_key)
-
-            # Retrieve the model
-            self.model = config["DEFAULT"].get("model_keyword", "").strip()
-            if not self.model:
-                logger.error("Model is missing or empty.")
-                raise KeyError("Model is missing or empty.")
-            logger.info(f"Model '{self.model}' successfully loaded.")
-
-            # Retrieve the list of parameters
-            self.parameters = [param.strip() for param in config["DEFAULT"].get("parameters", "").split(",") if param.strip()]
-            if not self.parameters:
-                logger.error("Parameters are missing or empty.")
-                raise KeyError("Parameters are missing or empty.")
-            logger.info(f"Parameters successfully loaded: {self.parameters}")
-
-        except FileNotFoundError as e:
-            logger.error(f"Configuration file error: {str(e)}")
-            raise
-        except KeyError as e:
-            logger.error(f"Configuration key error: {str(e)}")
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error while loading configuration: {str(e)}")
-            raise
-
-    def _initialize_groq(self, api_key):
-        """
-        Initialize the Groq client with the provided API key.
-        Ensures the client is ready for use.
-
-        Args:
-            api_key (str): The API key for Groq.
-        """
-        try:
-            logger.info("Initializing Groq client.")
-            self.client = Groq(api_key=api_key)
-            logger.info("Groq client initialized successfully.")
-        except Exception as e:
-            error_message = (
-                "Failed to initialize Groq client. Please ensure the API key is valid, "
-                "your network connection is active, and the Groq service is reachable. "
-                f"Error details: {e}"
-            )
-            logger.error(error_message)
-            raise RuntimeError(error_message)
-
-
+        get_groq_client()
+        self.model = settings.groq_model
+        self.parameters = list(settings.parameters)
 
 class KeywordExtractor:
     def __init__(self, image_text, config_manager):
@@ -101,11 +162,11 @@ class KeywordExtractor:
         
         Args:
             image_text (dict): Dictionary containing the text extracted from the image.
-            config_manager (ConfigurationManager): An instance of ConfigurationManager to access configuration and Groq client.
+            config_manager (ConfigurationManager): An instance of ConfigurationManager to access configuration.
         """
         self.image_text = image_text
         self.config_manager = config_manager
-        logger.info("KeywordExtractor initialized.")
+        logger.debug("KeywordExtractor initialized.")
 
     def _extract_data(self):
         """
@@ -115,25 +176,27 @@ class KeywordExtractor:
             dict: Extracted data organized by parameters.
         """
         try:
-            logger.info("Extracting data from the image text.")
+            logger.debug("Extracting data from the image text.")
             extracted_info = self.image_text.get('extracted_info', [])
 
-            # Organize extracted information by the configured parameters
-            extracted_data = {}
-            for param in self.config_manager.parameters:
-                values = [
-                    str(entry.get(param, "")).strip()  # Convert to string and strip extra spaces
-                    for entry in extracted_info if param in entry and str(entry.get(param, "")).strip()
-                ]
+            # Organize extracted information by the configured parameters in a single pass
+            parameters = self.config_manager.parameters
+            wanted = set(parameters)
+            values_by_param = defaultdict(list)
+            for entry in extracted_info:
+                for key, value in entry.items():
+                    if key in wanted:
+                        value = str(value).strip()  # Convert to string and strip extra spaces
+                        if value:
+                            values_by_param[key].append(value)
 
-                # Add only if values exist for the parameter
-                if values:
-                    extracted_data[param] = values
+            # Keep the configured parameter order; only parameters with values are added
+            extracted_data = {param: values_by_param[param] for param in parameters if param in values_by_param}
 
             if not extracted_data:
                 logger.warning("No valid extracted data found. Returning an empty dictionary.")
 
-            logger.debug(f"Final extracted data: {extracted_data}")
+            logger.debug("Final extracted data: %s", extracted_data)
             return extracted_data
 
         except Exception as e:
@@ -141,7 +204,7 @@ class KeywordExtractor:
             raise ValueError(f"Error extracting data from image text: {str(e)}")
 
 
-    def _generate_keywords(self, extracted_data):
+    async def _generate_keywords(self, extracted_data):
         """
         Generate keywords based on the extracted data using the Groq API.
         
@@ -152,7 +215,7 @@ class KeywordExtractor:
             list: List of keywords extracted by the Groq API.
         """
         try:
-            logger.info("Generating keywords from extracted data.")
+            logger.debug("Generating keywords from extracted data.")
             # Flatten all extracted values into a single list
             extracted_words = [item for sublist in extracted_data.values() for item in sublist]
 
@@ -161,8 +224,32 @@ class KeywordExtractor:
                 logger.warning("No words found in the extracted data. Returning an empty keyword list.")
                 return []
 
+            # Judge the recognized text alone (coordinates are not words): distinct
+            # non-stopwords, case-insensitively, keeping the first spelling seen
+            text_words = extracted_data.get(WORD_PARAMETER, extracted_words)
+            distinct_words = {}
+            for word in text_words:
+                if word.lower() not in STOPWORDS:
+                    distinct_words.setdefault(word.lower(), word)
+
+            if not distinct_words:
+                logger.warning("Only stopwords found in the extracted text. Returning an empty keyword list.")
+                return []
+
+            # A single distinct word is its own keyword; no need to ask Groq
+            if len(distinct_words) < 2:
+                return list(distinct_words.values())
+
+            # Reuse the keywords of an identical prompt seen before
+            cache_key = content_hash("\n".join(extracted_words).encode())
+            cached = _KEYWORD_CACHE.get(cache_key)
+            if cached is not None:
+                logger.debug("Keywords served from cache.")
+                return cached
+
             # Send extracted words to the Groq API for keyword extraction
-            chat_completion = self.config_manager.client.chat.completions.create(
+            chat_completion = await _create_chat_completion(
+                get_groq_client(),
                 messages=get_keyword_prompt(extracted_words),  # Correct assignment
                 model=self.config_manager.model,
             )
@@ -170,14 +257,15 @@ class KeywordExtractor:
             response = chat_completion.choices[0].message.content.strip()
             # Split response by commas to get individual keywords
             keywords = [keyword.strip() for keyword in response.split(",")]
-            logger.info(f"Keywords generated: {keywords}")
+            logger.debug("Keywords generated: %s", keywords)
+            _KEYWORD_CACHE.set(cache_key, keywords)
             return keywords
 
         except Exception as e:
             logger.error(f"Error during keyword extraction: {e}")
             return []
 
-    def _extract_keywords(self):
+    async def _extract_keywords(self):
         """
         Main method to extract keywords from the image text.
         Ensures configuration is loaded and processes the image text.
@@ -186,9 +274,10 @@ class KeywordExtractor:
             list: List of extracted keywords.
         """
         try:
-            logger.info("Starting keyword extraction process.")
-            # Ensure configuration is loaded
-            self.config_manager.load_config()
+            logger.debug("Starting keyword extraction process.")
+            # Ensure configuration is loaded (callers may have loaded it already)
+            if not self.config_manager.parameters:
+                self.config_manager.load_config()
 
             # Extract the necessary data from the image_text
             extracted_data = self._extract_data()
@@ -199,10 +288,10 @@ class KeywordExtractor:
                 return []
 
             # Log the extracted data for debugging purposes
-            logger.debug(f"Extracted data to process: {extracted_data}")
+            logger.debug("Extracted data to process: %s", extracted_data)
 
             # Generate and return the keywords
-            return self._generate_keywords(extracted_data)
+            return await self._generate_keywords(extracted_data)
 
         except ValueError as ve:
             logger.error(f"ValueError during keyword extraction process: {str(ve)}")
@@ -1,27 +1,208 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from io import BytesIO
+from typing import BinaryIO
 from PIL import Image
 import pytesseract
-from fastapi import UploadFile
 import cv2
 from input_layer.image_processor import ImageProcessor
+from app.configs.concurrency import worker_processes
 from app.configs.logging_config import setup_logger
 
+try:
+    import tesserocr
+except ImportError:  # Optional: in-process libtesseract bindings; pytesseract is used without them
+    tesserocr = None
+
 # Configure logger
 logger = setup_logger()
 
+# Number of OCR worker processes per server worker; each runs one decode/preprocess/
+# Tesseract job at a time. The CPUs are split between the server's worker processes
+# (WEB_CONCURRENCY) so the whole host runs about one OCR process per CPU.
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", max(1, (os.cpu_count() or 1) // worker_processes())))
+
+# pytesseract image_to_data columns copied into each extracted word, in output order
+OCR_COLUMNS = (
+    "text", "left", "top", "width", "height", "level",
+    "block_num", "par_num", "line_num", "word_num", "conf",
+)
+
+# Tesseract options: default engine, single uniform block of text (optimal for mixed text)
+OCR_CONFIG = "--oem 3 --psm 6"
+
+# One tesserocr API per thread: an instance is not thread-safe, and loading the
+# language model is the expensive part, so each thread keeps its own for reuse
+_TESSERACT = threading.local()
+
+# Most horizontal strips a tall page is cut into and recognized in parallel. A page
+# that is its server worker's only OCR job gets all of them (by default the worker's
+# share of the CPUs); concurrent jobs divide them, so a busy pool OCRs each page whole.
+# Set to 1 to disable strip OCR.
+OCR_STRIPS = int(os.environ.get("OCR_STRIPS", max(1, (os.cpu_count() or 1) // worker_processes())))
+# Strips are never shorter than this, so short images are recognized in one piece
+MIN_STRIP_HEIGHT = 400
+# Rows shared by neighbouring strips, so a text line on a strip boundary is seen whole by one of them
+STRIP_OVERLAP = 40
+
+
+def _tesseract_api():
+    """
+    Get this thread's tesserocr API, initializing it on first use.
+
+    Returns:
+        tesserocr.PyTessBaseAPI: The API configured like OCR_CONFIG.
+    """
+    api = getattr(_TESSERACT, "api", None)
+    if api is None:
+        logger.info("Initializing tesserocr API.")
+        api = tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.SINGLE_BLOCK, oem=tesserocr.OEM.DEFAULT)
+        _TESSERACT.api = api
+    return api
+
+
+def _tesserocr_image_to_data(image) -> dict:
+    """
+    Run libtesseract in-process through tesserocr and return word rows in the
+    pytesseract image_to_data layout.
+
+    Args:
+        image (np.ndarray): The single-channel image.
+
+    Returns:
+        dict: One list per image_to_data column, with one row per recognized word.
+    """
+    api = _tesseract_api()
+    api.SetImage(Image.fromarray(image))
+    api.Recognize()
+
+    data = {key: [] for key in ("page_num",) + OCR_COLUMNS}
+    iterator = api.GetIterator()
+    if iterator is None:
+        return data
+
+    word_level = tesserocr.RIL.WORD
+    block_num = par_num = line_num = word_num = 0
+    for word in tesserocr.iterate_level(iterator, word_level):
+        # Numbering matches Tesseract's TSV output: each counter restarts inside its parent
+        if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+            block_num, par_num = block_num + 1, 0
+        if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+            par_num, line_num = par_num + 1, 0
+        if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+            line_num, word_num = line_num + 1, 0
+        word_num += 1
+
+        box = word.BoundingBox(word_level)
+        if box is None:
+            continue
+        left, top, right, bottom = box
+        row = {
+            "page_num": 1, "level": 5, "block_num": block_num, "par_num": par_num,
+            "line_num": line_num, "word_num": word_num, "left": left, "top": top,
+            "width": right - left, "height": bottom - top,
+            # pytesseract truncates confidences to int; match it so responses do not depend on the backend
+            "conf": int(word.Confidence(word_level)), "text": word.GetUTF8Text(word_level),
+        }
+        for key, values in data.items():
+            values.append(row[key])
+    return data
+
+
+def _image_to_data(image) -> dict:
+    """
+    Run Tesseract on a binarized image, in-process through tesserocr when it is
+    installed, otherwise through the pytesseract subprocess wrapper.
+
+    Args:
+        image (np.ndarray): The single-channel image.
+
+    Returns:
+        dict: image_to_data output, one list per column.
+    """
+    if tesserocr is not None:
+        return _tesserocr_image_to_data(image)
+    return pytesseract.image_to_data(image, config=OCR_CONFIG, output_type=pytesseract.Output.DICT)
+
+
+@functools.lru_cache(maxsize=1)
+def _strip_pool() -> ThreadPoolExecutor:
+    """
+    Get this process's pool of strip OCR threads, creating it on first use.
+    The threads are long-lived so their tesserocr APIs are reused across jobs.
+    It is only created once a page is actually split, so it never exists when
+    OCR_STRIPS is 1.
+
+    Returns:
+        ThreadPoolExecutor: The shared strip OCR thread pool.
+    """
+    return ThreadPoolExecutor(max_workers=OCR_STRIPS, thread_name_prefix="ocr-strip")
+
+
+def _image_to_data_in_strips(image, strips: int = OCR_STRIPS) -> dict:
+    """
+    Run Tesseract on horizontal strips of the image in parallel and merge the results.
+    Each strip is padded with STRIP_OVERLAP rows on both sides, and a row of the
+    result is kept only by the strip whose own range contains its vertical centre,
+    so words in the overlaps are not reported twice. Both Tesseract backends
+    run outside the GIL (subprocess or released GIL), so threads are enough to
+    use several cores.
+
+    Args:
+        image (np.ndarray): The single-channel image.
+        strips (int): Maximum number of strips.
+
+    Returns:
+        dict: image_to_data output in full-image coordinates, with block numbers made unique across strips.
+    """
+    height = image.shape[0]
+    strips = min(strips, height // MIN_STRIP_HEIGHT)
+    if strips <= 1:
+        return _image_to_data(image)
+
+    bounds = [height * index // strips for index in range(strips + 1)]
+    origins = [max(0, bounds[index] - STRIP_OVERLAP) for index in range(strips)]
+    logger.debug("Running OCR on %d strips in parallel.", strips)
+    results = list(_strip_pool().map(
+        _image_to_data,
+        (image[origins[index]:bounds[index + 1] + STRIP_OVERLAP] for index in range(strips)),
+    ))
+
+    merged = {key: [] for key in results[0]}
+    block_offset = 0
+    for start, end, origin, data in zip(bounds, bounds[1:], origins, results):
+        for row in range(len(data["text"])):
+            top = data["top"][row] + origin
+            if not start <= top + data["height"][row] // 2 < end:
+                continue
+            for key, values in merged.items():
+                values.append(data[key][row])
+            merged["top"][-1] = top
+            merged["block_num"][-1] += block_offset
+        block_offset = max(merged["block_num"], default=block_offset)
+    return merged
+
+
 class ImageTextExtractor:
     """
     A class to handle the text extraction process from an image using OCR.
     """
 
-    def __init__(self, file: UploadFile):
+    def __init__(self, file: BinaryIO, strips: int = 1):
         """
         Initialize the ImageTextExtractor class with an uploaded file.
 
         Args:
-            file (UploadFile): The uploaded image file.
+            file (BinaryIO): A seekable binary file object holding the encoded image,
+                e.g. the io.BytesIO that ocr_worker wraps around the uploaded bytes.
+            strips (int): Maximum number of strips the page is recognized in, in parallel.
         """
         self.file = file
+        self.strips = strips
 
     def extract_text_from_image(self):
         """
@@ -32,12 +213,14 @@ class ImageTextExtractor:
             dict: A dictionary containing extracted text information and other metadata.
         """
         try:
-            logger.info("Starting text extraction process.")
+            logger.debug("Starting text extraction process.")
 
             # Read the uploaded image file
             try:
-                logger.debug("Reading the image file into memory.")
-                image = Image.open(BytesIO(self.file.file.read()))
+                logger.debug("Decoding the image file.")
+                self.file.seek(0)
+                image = Image.open(self.file)
+                image.load()  # Decode now, while the file is known to be open
                 logger.debug("Image successfully loaded.")
             except Exception as e:
                 logger.error(f"Error opening image: {str(e)}")
@@ -46,30 +229,33 @@ class ImageTextExtractor:
             # Initialize the ImageProcessor class
             image_processor = ImageProcessor()
 
+            # Downscale very large images; OCR boxes are mapped back to the original size below
+            try:
+                original_width = image.width
+                image = image_processor.limit_image_size(image)
+                box_scale = original_width / image.width
+            except Exception as e:
+                logger.error(f"Error downscaling image: {str(e)}")
+                raise ValueError(f"Error downscaling image: {str(e)}")
+
             # Preprocess the image
             try:
                 logger.debug("Preprocessing the image.")
                 preprocessed_image = image_processor.preprocess_image(image)
+                # From here on the uint8 array is the only full-size buffer kept alive
+                image.close()
+                del image
                 logger.debug("Image preprocessing completed.")
             except Exception as e:
                 logger.error(f"Error during image preprocessing: {str(e)}")
                 raise ValueError(f"Error during preprocessing: {str(e)}")
 
-            # Convert the image to OpenCV format
-            try:
-                logger.debug("Converting preprocessed image to OpenCV format.")
-                open_cv_image = image_processor.convert_image_to_cv_format(preprocessed_image)
-                logger.debug("Conversion to OpenCV format successful.")
-            except Exception as e:
-                logger.error(f"Error converting image to OpenCV format: {str(e)}")
-                raise ValueError(f"Error converting to OpenCV format: {str(e)}")
-
             # Apply binarization for better OCR results
             try:
                 logger.debug("Applying adaptive thresholding for binarization.")
-                gray = cv2.cvtColor(open_cv_image, cv2.COLOR_BGR2GRAY)
                 binarized_image = cv2.adaptiveThreshold(
-                    gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+                    preprocessed_image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2,
+                    dst=preprocessed_image,  # In place; the preprocessed image is not needed afterwards
                 )
                 logger.debug("Binarization completed.")
             except Exception as e:
@@ -79,10 +265,8 @@ class ImageTextExtractor:
             # Use pytesseract to get detailed OCR data
             try:
                 logger.debug("Performing OCR on the processed image.")
-                custom_config = "--oem 3 --psm 6"  # Optimal configuration for mixed text
-                ocr_data = pytesseract.image_to_data(
-                    binarized_image, config=custom_config, output_type=pytesseract.Output.DICT
-                )
+                ocr_data = _image_to_data_in_strips(binarized_image, self.strips)
+                del binarized_image, preprocessed_image
                 logger.debug("OCR performed successfully.")
             except pytesseract.TesseractError as tesseract_error:
                 logger.error(f"Tesseract error during OCR: {str(tesseract_error)}")
@@ -92,34 +276,39 @@ class ImageTextExtractor:
                 raise ValueError(f"Error during OCR: {str(e)}")
 
             # Prepare the JSON response structure
-            extracted_info = []
             try:
                 logger.debug("Processing OCR data into structured response.")
-                for i in range(len(ocr_data["text"])):
-                    if int(ocr_data["conf"][i]) > 0:  # Only include words with confidence greater than 0
-                        extracted_info.append({
-                            "word": ocr_data["text"][i],
-                            "x": ocr_data["left"][i],
-                            "y": ocr_data["top"][i],
-                            "width": ocr_data["width"][i],
-                            "height": ocr_data["height"][i],
-                            "level": ocr_data["level"][i],
-                            "block_num": ocr_data["block_num"][i],
-                            "par_num": ocr_data["par_num"][i],
-                            "line_num": ocr_data["line_num"][i],
-                            "word_num": ocr_data["word_num"][i],
-                            "confidence": ocr_data["conf"][i],
-                            "fontname": "N/A",  # Placeholder, as Tesseract does not provide fontname directly
-                            "fontsize": "N/A",  # Placeholder, Tesseract does not provide fontsize directly
-                            "orientation": "N/A",  # Placeholder
-                            "script": "N/A"  # Placeholder
-                        })
+                if box_scale != 1.0:
+                    for key in ("left", "top", "width", "height"):
+                        ocr_data[key] = [round(value * box_scale) for value in ocr_data[key]]
+                columns = (ocr_data[key] for key in OCR_COLUMNS)
+                extracted_info = [
+                    {
+                        "word": word,
+                        "x": x,
+                        "y": y,
+                        "width": width,
+                        "height": height,
+                        "level": level,
+                        "block_num": block_num,
+                        "par_num": par_num,
+                        "line_num": line_num,
+                        "word_num": word_num,
+                        "confidence": conf,
+                        "fontname": "N/A",  # Placeholder, as Tesseract does not provide fontname directly
+                        "fontsize": "N/A",  # Placeholder, Tesseract does not provide fontsize directly
+                        "orientation": "N/A",  # Placeholder
+                        "script": "N/A"  # Placeholder
+                    }
+                    for word, x, y, width, height, level, block_num, par_num, line_num, word_num, conf in zip(*columns)
+                    if int(conf) > 0  # Only include words with confidence greater than 0
+                ]
                 logger.debug("OCR data processed into structured response.")
             except Exception as e:
                 logger.error(f"Error processing OCR data: {str(e)}")
                 raise ValueError(f"Error processing OCR data: {str(e)}")
 
-            logger.info("Text extraction completed successfully.")
+            logger.debug("Text extraction completed successfully.")
             return {"extracted_info": extracted_info}
 
         except ValueError as ve:
@@ -129,3 +318,60 @@ class ImageTextExtractor:
         except Exception as e:
             logger.error(f"Unexpected error during text extraction: {str(e)}")
             return {"error": f"Unexpected error: {str(e)}"}
+
+
+def ocr_worker(image_bytes: bytes, strips: int = 1) -> dict:
+    """
+    Run the full OCR pipeline on an encoded image.
+    Module-level so it can be pickled and run in the OCR process pool.
+
+    Args:
+        image_bytes (bytes): The encoded image file content.
+        strips (int): Maximum number of strips the page is recognized in, in parallel.
+
+    Returns:
+        dict: The result of ImageTextExtractor.extract_text_from_image.
+    """
+    return ImageTextExtractor(BytesIO(image_bytes), strips).extract_text_from_image()
+
+
+@functools.lru_cache(maxsize=1)
+def get_ocr_executor() -> ProcessPoolExecutor:
+    """
+    Get the process-wide pool that OCR jobs run in, creating it on first use.
+    Workers are spawned rather than forked so they do not inherit the parent's
+    torch and event loop threads.
+
+    Returns:
+        ProcessPoolExecutor: The shared OCR process pool.
+    """
+    logger.info(f"Starting OCR process pool with {OCR_WORKERS} worker(s).")
+    return ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+
+# OCR jobs of this server worker currently submitted to the pool; only touched on the event loop
+_jobs_in_flight = 0
+
+
+async def run_ocr(image_bytes: bytes) -> dict:
+    """
+    Run ocr_worker in the OCR process pool without blocking the event loop.
+    The job is allowed OCR_STRIPS divided by the number of jobs in flight, so
+    a lone upload is recognized in parallel strips while a busy pool keeps
+    one thread per job.
+
+    Args:
+        image_bytes (bytes): The encoded image file content.
+
+    Returns:
+        dict: The result of ImageTextExtractor.extract_text_from_image.
+    """
+    global _jobs_in_flight
+    _jobs_in_flight += 1
+    try:
+        strips = max(1, OCR_STRIPS // _jobs_in_flight)
+        return await asyncio.get_running_loop().run_in_executor(
+            get_ocr_executor(), ocr_worker, image_bytes, strips
+        )
+    finally:
+        _jobs_in_flight -= 1
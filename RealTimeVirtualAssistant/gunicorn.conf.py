@@ -0,0 +1,41 @@
+"""
+Gunicorn configuration for production deployments.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The app is imported once in the master process and the BERT weights are
+loaded there before workers are forked, so every worker shares the same
+weight pages copy-on-write instead of loading its own copy.
+"""
+# app.run must come first: it exports WEB_CONCURRENCY, which the model module
+# reads at import to size its thread pools
+from app.run import HOST, PORT, LOGLEVEL, WORKERS
+import torch
+from app.configs.concurrency import inference_threads
+from app.models.BERTModel import USE_CUDA, get_bert
+
+bind = f"{HOST}:{PORT}"
+workers = WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+loglevel = LOGLEVEL
+
+
+def when_ready(server):
+    """
+    Load the shared BERT model in the master once the app is preloaded.
+    Skipped on GPU hosts: CUDA cannot be used across fork, so each worker
+    loads the model itself during the FastAPI lifespan instead.
+    """
+    if USE_CUDA:
+        return
+    server.log.info("Preloading the BERT model before forking workers.")
+    get_bert()
+
+
+def post_fork(server, worker):
+    """
+    Size the worker's torch thread pool by the worker count gunicorn actually
+    runs, which differs from WEB_CONCURRENCY when started with -w.
+    """
+    torch.set_num_threads(inference_threads(server.cfg.workers))
@@ -1,10 +1,50 @@
-import torch
+import asyncio
+import base64
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from app.models import BERTModel
+from app.models.BERTModel import get_bert
 from app.configs.logging_config import setup_logger
+from app.services.cache_service import ResponseCache, content_hash
 
 # Configure logger
 logger = setup_logger()
 
+# Pad sequences up to a multiple of this length so the model only ever sees a
+# small, fixed set of input shapes
+PAD_TO_MULTIPLE_OF = 32
+
+# Tokenizer call arguments, built once instead of on every request
+TOKENIZER_KWARGS = {
+    "truncation": True,
+    "max_length": 512,
+}
+
+# Padding arguments used when collating tokenized texts into a batch
+PAD_KWARGS = {
+    "return_tensors": "pt",
+    "padding": True,
+    "pad_to_multiple_of": PAD_TO_MULTIPLE_OF,
+}
+
+# Number of recent tokenizer encodings kept, keyed by text hash
+TOKENIZER_CACHE_SIZE = 2048
+
+# Largest number of texts embedded in one forward pass
+MAX_BATCH = 32
+# Batch sizes a compiled (CUDA graph) model is run at; smaller batches are padded
+# up to the next size so only a handful of shapes is ever captured
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, MAX_BATCH)
+# Largest padded token count (texts x padded length) of one forward pass; batches
+# over budget are split into sub-batches of similar length
+MAX_BATCH_TOKENS = 4096
+# A sub-batch is also split once a text's padded length exceeds this multiple of the
+# sub-batch's shortest padded length, which bounds the padding spent on short texts
+MAX_PADDING_RATIO = 2
+# How long the batching worker waits for more requests before running a batch
+MAX_WAIT_MS = 5
+
 
 class TextEmbedder:
     """
@@ -18,42 +58,267 @@ class TextEmbedder:
         Args:
             bert_model (BERTModel): An instance of the BERTModel class.
         """
+        self.bert_model = bert_model
         self.tokenizer = bert_model.get_tokenizer()
         self.model = bert_model.get_model()
+        # Encodings never go stale, so entries only leave the cache by LRU eviction
+        self._encodings = ResponseCache(maxsize=TOKENIZER_CACHE_SIZE, ttl_seconds=float("inf"))
+
+    def _tokenize_batch(self, texts: list) -> list:
+        """
+        Tokenize texts without padding, reusing the cached encodings of repeated texts.
+        Texts missing from the cache are tokenized together in one call.
+
+        Args:
+            texts (list): The input texts.
+
+        Returns:
+            list: One tokenizer encoding (input_ids, attention_mask, ...) per text,
+                in the same order. Treat them as read-only.
+        """
+        keys = [content_hash(text.encode()) for text in texts]
+        encodings = [self._encodings.get(key) for key in keys]
+        missing = [index for index, encoding in enumerate(encodings) if encoding is None]
+        if missing:
+            batch = self.tokenizer([texts[index] for index in missing], **TOKENIZER_KWARGS)
+            for position, index in enumerate(missing):
+                encoding = {name: values[position] for name, values in batch.items()}
+                self._encodings.set(keys[index], encoding)
+                encodings[index] = encoding
+        return encodings
+
+    def _embed_batch(self, encodings: list) -> np.ndarray:
+        """
+        Pad a list of tokenized texts to a common length and embed them in one forward pass.
+
+        Args:
+            encodings (list): Tokenizer encodings as returned by _tokenize_batch.
 
-    def _generate_text_embeddings(self, text: str) -> list:
+        Returns:
+            np.ndarray: A float32 array with one row per encoding, in the same order.
+                On CPU it is a view into the model output.
+        """
+        logger.debug("Embedding a batch of %d text(s).", len(encodings))
+        count = len(encodings)
+        if self.bert_model.static_shapes:
+            # Repeat the first text up to the next fixed batch size; the extra rows are dropped below
+            size = next((size for size in BATCH_SIZE_BUCKETS if size >= count), count)
+            encodings = encodings + [encodings[0]] * (size - count)
+
+        inputs = self.tokenizer.pad(encodings, **PAD_KWARGS)
+        if self.bert_model.device != "cpu":
+            # Pinned host buffers let the host-to-device copies run asynchronously
+            inputs = {
+                name: tensor.pin_memory().to(self.bert_model.device, non_blocking=True)
+                for name, tensor in inputs.items()
+            }
+
+        with self.bert_model.inference_context():
+            outputs = self.model(**inputs)
+
+        # Extract the embeddings from the last hidden state using the [CLS] token representation
+        text_embeddings = outputs.last_hidden_state[:count, 0, :].float().cpu().numpy()  # Convert to numpy array
+        logger.debug("text embeddings generated with shape: %s", text_embeddings.shape)
+        return text_embeddings
+
+    def warmup(self):
+        """
+        Run dummy forward passes so one-time setup (torch.compile, CUDA graph
+        capture, oneDNN kernel selection) happens before the first request.
+        Compiled models are warmed at every batch size in BATCH_SIZE_BUCKETS.
+        Must run on the thread that serves inference, since CUDA graphs are per thread.
+        """
+        encoding = self._tokenize_batch(["warmup"])[0]
+        sizes = BATCH_SIZE_BUCKETS if self.bert_model.static_shapes else (1,)
+        for size in sizes:
+            self._embed_batch([encoding] * size)
+        logger.info("Embedding model warm-up complete.")
+
+    def _embed_texts(self, texts: list) -> list:
         """
-        Generate the embedding for a given text.
+        Tokenize and embed a list of texts with as few forward passes as the token budget allows.
+        Texts are sorted by token length and cut into consecutive sub-batches whose
+        padded size stays within MAX_BATCH_TOKENS and whose longest text is at most
+        MAX_PADDING_RATIO times its shortest (after padding), so short texts are not
+        padded to the length of a long one. Results are returned in the original order.
+
+        Args:
+            texts (list): The input texts.
+
+        Returns:
+            list: One float32 np.ndarray per text, in the same order.
+        """
+        encodings = self._tokenize_batch(texts)
+        lengths = [len(encoding["input_ids"]) for encoding in encodings]
+        order = sorted(range(len(encodings)), key=lengths.__getitem__)
+
+        # Lengths ascend through order, so a sub-batch pads to its last text's length
+        buckets, bucket, first_length = [], [], 0
+        for index in order:
+            padded_length = -(-lengths[index] // PAD_TO_MULTIPLE_OF) * PAD_TO_MULTIPLE_OF
+            if bucket and (
+                padded_length * (len(bucket) + 1) > MAX_BATCH_TOKENS
+                or padded_length > first_length * MAX_PADDING_RATIO
+            ):
+                buckets.append(bucket)
+                bucket = []
+            if not bucket:
+                first_length = padded_length
+            bucket.append(index)
+        buckets.append(bucket)
+
+        embeddings = [None] * len(encodings)
+        for bucket in buckets:
+            for index, embedding in zip(bucket, self._embed_batch([encodings[index] for index in bucket])):
+                # Copy each row out so cached embeddings do not keep the whole model output alive
+                embeddings[index] = embedding.copy()
+        return embeddings
+
+
+class BatchingEmbedder:
+    """
+    Coalesce concurrent embedding requests into batched forward passes.
+    Requests are queued and a background worker drains up to max_batch of them
+    (waiting at most max_wait_ms for the batch to fill), then tokenizes and
+    embeds them with one tokenizer call and one model call off the event loop.
+    All inference runs on one dedicated thread: torch.compile's CUDA graphs
+    are recorded per thread, and batches are serialized by the worker anyway.
+    """
+
+    def __init__(self, text_embedder: TextEmbedder, max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS):
+        """
+        Initialize the BatchingEmbedder.
+
+        Args:
+            text_embedder (TextEmbedder): The embedder used to run each batch.
+            max_batch (int): Largest number of texts embedded in one forward pass.
+            max_wait_ms (float): Longest time to wait for a batch to fill, in milliseconds.
+        """
+        self.text_embedder = text_embedder
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self._worker = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bert-inference")
+
+    def start(self):
+        """
+        Start the background batching worker on the running event loop.
+        """
+        if self._worker is None or self._worker.done():
+            self.queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+            logger.info("Embedding batching worker started.")
+
+    async def warmup(self):
+        """
+        Warm up the model on the inference thread.
+        """
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.text_embedder.warmup)
+
+    async def stop(self):
+        """
+        Stop the background batching worker.
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            logger.info("Embedding batching worker stopped.")
+
+    async def submit(self, text: str) -> np.ndarray:
+        """
+        Queue a text for embedding and wait for its batch to complete.
 
         Args:
             text (str): The input text to generate the embedding for.
 
         Returns:
-            list: A list of floats representing the text embedding.
+            np.ndarray: The float32 text embedding.
         """
-        try:
-            logger.info(f"Generating embedding for text: '{text[:50]}'")
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future))
+        return await future
 
-            # Tokenize the input text
-            logger.debug("Tokenizing text.")
-            inputs = self.tokenizer(
-                text, return_tensors='pt', truncation=True, padding=True, max_length=512
-            )
+    async def _run(self):
+        """
+        Worker loop: collect a batch from the queue, embed it off the event loop,
+        and resolve each request's future with its slice of the output.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
 
-            # Get embeddings from the model
-            logger.debug("Fetching embeddings from the model.")
-            with torch.no_grad():
-                outputs = self.model(**inputs)
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = await loop.run_in_executor(self._executor, self.text_embedder._embed_texts, texts)
+            except Exception as e:
+                logger.error(f"Error while generating batched text embeddings: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
 
-            # Extract the embeddings from the last hidden state using the [CLS] token representation
-            text_embedding = outputs.last_hidden_state[0][0].numpy()  # Convert to numpy array
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
 
-            # Log the shape of the embedding
-            logger.debug(f"text embedding generated with shape: {text_embedding.shape}")
 
-            logger.info("Text embedding generated successfully.")
-            return text_embedding.tolist()
+def encode_embedding(embedding: np.ndarray, encoding_format: str) -> dict:
+    """
+    Pack an embedding into a compact base64 buffer.
+    "float16" stores half-precision values; "int8" stores a symmetric int8
+    quantization where each value is int8 * scale. Clients decode with
+    np.frombuffer(base64.b64decode(embedding_b64), dtype=dtype) (times scale for int8).
+
+    Args:
+        embedding (np.ndarray): The embedding vector.
+        encoding_format (str): "float16" or "int8".
 
-        except Exception as e:
-            logger.error(f"Error while generating text embedding: {str(e)}")
-            return []
+    Returns:
+        dict: embedding_b64, dtype, dim and, for int8, scale.
+    """
+    values = np.asarray(embedding, dtype=np.float32)
+    scale = None
+    if encoding_format == "int8":
+        max_abs = float(np.abs(values).max()) if values.size else 0.0
+        scale = max_abs / 127 if max_abs else 1.0
+        packed = np.clip(np.rint(values / scale), -127, 127).astype(np.int8)
+    elif encoding_format == "float16":
+        packed = values.astype(np.float16)
+    else:
+        raise ValueError(f"Unsupported embedding encoding format: {encoding_format}")
+
+    encoded = {
+        "embedding_b64": base64.b64encode(packed.tobytes()).decode("ascii"),
+        "dtype": encoding_format,
+        "dim": int(values.size),
+    }
+    if scale is not None:
+        encoded["scale"] = scale
+    return encoded
+
+
+@functools.lru_cache(maxsize=1)
+def get_batching_embedder() -> BatchingEmbedder:
+    """
+    Get the process-wide BatchingEmbedder built on the shared BERT model.
+    Usable directly or as a FastAPI dependency.
+
+    Returns:
+        BatchingEmbedder: The shared BatchingEmbedder instance.
+    """
+    return BatchingEmbedder(TextEmbedder(get_bert()))
@@ -12,17 +12,23 @@ setup(
     package_dir={'': '.'},        # Map package to the src directory
     install_requires=[
         'fastapi==0.115.7', 
-        'uvicorn==0.34.0', 
+        'uvicorn[standard]==0.34.0', 
         'pytesseract==0.3.13',
         'opencv-python==4.11.0.86', 
         'groq==0.15.0', 
         'transformers==4.48.1', 
         'torch==2.5.1', 
-        'pyfiglet==1.0.2', 
         'python-multipart==0.0.20',
-        'colorama==0.4.6'
+        'colorama==0.4.6',
+        'tenacity==9.0.0',
+        'orjson==3.10.15'
 
     ],
+    extras_require={
+        'onnx': ['optimum[onnxruntime]'],  # EMBEDDING_BACKEND=onnx
+        'gunicorn': ['gunicorn'],  # gunicorn -c gunicorn.conf.py app.main:app
+        'tesserocr': ['tesserocr'],  # In-process Tesseract instead of the pytesseract subprocess
+    },
     entry_points={
         'console_scripts': [
             'realtime_va=app.run:main',
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The tests import the service packages (app, input_layer) from the project root;
+# run them from there, since settings read config/config.ini relative to the working directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,55 @@
+from app.services import cache_service
+from app.services.cache_service import ResponseCache, content_hash
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_content_hash_is_a_stable_16_byte_digest():
+    assert content_hash(b"image") == content_hash(b"image")
+    assert content_hash(b"image") != content_hash(b"other")
+    assert len(content_hash(b"image")) == 16
+
+
+def test_evicts_least_recently_used_entry():
+    cache = ResponseCache(maxsize=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_overwriting_a_key_refreshes_its_recency():
+    cache = ResponseCache(maxsize=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+    cache.set("c", 3)
+
+    assert cache.get("a") == 10
+    assert cache.get("b") is None
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_service.time, "monotonic", clock)
+    cache = ResponseCache(maxsize=8, ttl_seconds=10)
+    cache.set("a", 1)
+
+    clock.now += 10
+    assert cache.get("a") == 1
+    clock.now += 0.5
+    assert cache.get("a", "missing") == "missing"
+    # Expired entries are dropped on lookup
+    assert len(cache) == 0
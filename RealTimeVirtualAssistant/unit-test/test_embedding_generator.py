@@ -0,0 +1,174 @@
+import asyncio
+import base64
+import contextlib
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import torch
+
+from input_layer.embedding_generator import MAX_BATCH_TOKENS, BatchingEmbedder, TextEmbedder, encode_embedding
+
+HIDDEN_SIZE = 2
+
+
+class FakeTokenizer:
+    """Tokenizes a text into one token per word and pads like a Hugging Face tokenizer."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts, **kwargs):
+        self.calls += 1
+        input_ids = [[1] * len(text.split()) for text in texts]
+        return {"input_ids": input_ids, "attention_mask": [[1] * len(ids) for ids in input_ids]}
+
+    def pad(self, encodings, padding, pad_to_multiple_of, return_tensors):
+        longest = max(len(encoding["input_ids"]) for encoding in encodings)
+        length = -(-longest // pad_to_multiple_of) * pad_to_multiple_of
+        return {
+            name: torch.tensor([encoding[name] + [0] * (length - len(encoding[name])) for encoding in encodings])
+            for name in ("input_ids", "attention_mask")
+        }
+
+
+class FakeModel:
+    """Embeds each text as [token count, padded length] and records the batch shapes it sees."""
+
+    def __init__(self, dtype=torch.float32):
+        self.dtype = dtype
+        self.shapes = []
+
+    def __call__(self, input_ids, attention_mask):
+        self.shapes.append(tuple(input_ids.shape))
+        batch, length = input_ids.shape
+        hidden = torch.zeros(batch, length, HIDDEN_SIZE, dtype=self.dtype)
+        hidden[:, 0, 0] = attention_mask.sum(dim=1)
+        hidden[:, 0, 1] = length
+        return SimpleNamespace(last_hidden_state=hidden)
+
+
+def make_embedder(static_shapes=False, dtype=torch.float32):
+    tokenizer, model = FakeTokenizer(), FakeModel(dtype)
+    bert = SimpleNamespace(
+        get_tokenizer=lambda: tokenizer,
+        get_model=lambda: model,
+        static_shapes=static_shapes,
+        device="cpu",
+        inference_context=contextlib.nullcontext,
+    )
+    return TextEmbedder(bert), tokenizer, model
+
+
+def text_of(words):
+    return " ".join(["word"] * words)
+
+
+@pytest.mark.parametrize("dtype", [torch.float32, torch.float16, torch.bfloat16])
+def test_embeddings_are_float32_vectors_whatever_the_model_precision(dtype):
+    # /generate-embeddings relies on this instead of checking every value
+    embedder, _, _ = make_embedder(dtype=dtype)
+
+    embeddings = embedder._embed_texts([text_of(3), text_of(40)])
+
+    for embedding in embeddings:
+        assert isinstance(embedding, np.ndarray)
+        assert embedding.dtype == np.float32
+        assert embedding.shape == (HIDDEN_SIZE,)
+
+
+def test_submitted_texts_resolve_to_float32_vectors():
+    embedder, _, _ = make_embedder(dtype=torch.bfloat16)
+    batching_embedder = BatchingEmbedder(embedder, max_wait_ms=1)
+
+    async def submit_and_stop():
+        try:
+            return await asyncio.gather(batching_embedder.submit(text_of(2)), batching_embedder.submit(text_of(5)))
+        finally:
+            await batching_embedder.stop()
+
+    embeddings = asyncio.run(submit_and_stop())
+
+    assert [embedding.dtype for embedding in embeddings] == [np.float32, np.float32]
+    assert [int(embedding[0]) for embedding in embeddings] == [2, 5]
+
+
+def test_static_shapes_pad_the_batch_size():
+    embedder, _, model = make_embedder(static_shapes=True)
+
+    embeddings = embedder._embed_texts([text_of(2), text_of(4), text_of(6)])
+
+    # Three texts run at the next fixed batch size, and the padding rows are dropped
+    assert model.shapes == [(4, 32)]
+    assert [int(embedding[0]) for embedding in embeddings] == [2, 4, 6]
+
+
+def test_encode_float16_round_trip():
+    embedding = np.random.default_rng(0).standard_normal(768).astype(np.float32)
+
+    encoded = encode_embedding(embedding, "float16")
+    decoded = np.frombuffer(base64.b64decode(encoded["embedding_b64"]), dtype=np.float16)
+
+    assert encoded["dtype"] == "float16"
+    assert encoded["dim"] == 768
+    np.testing.assert_allclose(decoded, embedding, rtol=1e-3, atol=1e-3)
+
+
+def test_encode_int8_round_trip():
+    embedding = np.random.default_rng(0).standard_normal(768).astype(np.float32)
+
+    encoded = encode_embedding(embedding, "int8")
+    decoded = np.frombuffer(base64.b64decode(encoded["embedding_b64"]), dtype=np.int8) * encoded["scale"]
+
+    assert encoded["dim"] == 768
+    assert np.abs(decoded - embedding).max() <= encoded["scale"] / 2 + 1e-6
+
+
+def test_encode_int8_of_zero_vector():
+    encoded = encode_embedding(np.zeros(4, dtype=np.float32), "int8")
+
+    assert encoded["scale"] == 1.0
+    assert not np.frombuffer(base64.b64decode(encoded["embedding_b64"]), dtype=np.int8).any()
+
+
+def test_encode_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        encode_embedding(np.zeros(4, dtype=np.float32), "bfloat16")
+
+
+def test_repeated_texts_reuse_cached_encodings():
+    embedder, tokenizer, _ = make_embedder()
+
+    embedder._embed_texts(["a b", "c"])
+    embedder._embed_texts(["c", "a b"])
+
+    assert tokenizer.calls == 1
+
+
+def test_embeddings_keep_input_order():
+    embedder, _, _ = make_embedder()
+    lengths = [1, 3, 7, 40, 90, 200, 500, 500]
+    random.Random(0).shuffle(lengths)
+
+    embeddings = embedder._embed_texts([text_of(length) for length in lengths])
+
+    assert [int(embedding[0]) for embedding in embeddings] == lengths
+
+
+def test_texts_are_bucketed_by_padded_length():
+    embedder, _, model = make_embedder()
+
+    embedder._embed_texts([text_of(length) for length in [500, 1, 90, 3, 200, 7, 500, 40]])
+
+    # 32, 32, 32 and 64 share a bucket (64 <= 2 * 32); 96, 224 and 512 each start a new one
+    assert model.shapes == [(4, 64), (1, 96), (1, 224), (2, 512)]
+
+
+def test_buckets_respect_the_token_budget():
+    embedder, _, model = make_embedder()
+
+    embedder._embed_texts([text_of(500) for _ in range(10)])
+
+    per_batch = MAX_BATCH_TOKENS // 512
+    assert model.shapes == [(per_batch, 512), (10 - per_batch, 512)]
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import extract_keywords_service
+from app.services.extract_keywords_service import AsyncRateLimiter, KeywordExtractor
+
+
+def test_burst_is_not_delayed():
+    limiter = AsyncRateLimiter(requests_per_minute=60, burst=3)
+
+    async def acquire_burst():
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(acquire_burst()) < 0.5
+
+
+def test_acquisitions_beyond_burst_wait_for_a_token():
+    # 600 requests per minute refills one token every 0.1 s
+    limiter = AsyncRateLimiter(requests_per_minute=600, burst=1)
+
+    async def acquire_three():
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(acquire_three()) >= 0.19
+
+
+def test_concurrent_acquisitions_are_serialized():
+    limiter = AsyncRateLimiter(requests_per_minute=600, burst=2)
+
+    async def acquire_concurrently():
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.acquire() for _ in range(4)))
+        return time.monotonic() - start
+
+    assert asyncio.run(acquire_concurrently()) >= 0.19
+
+
+def test_limiter_created_outside_a_loop_works_on_later_loops():
+    limiter = AsyncRateLimiter(requests_per_minute=6000, burst=1)
+
+    asyncio.run(limiter.acquire())
+    asyncio.run(limiter.acquire())
+
+
+@pytest.fixture
+def groq_prompts(monkeypatch):
+    """Replace the Groq call with a fake that records each prompt and answers "alpha, beta"."""
+    prompts = []
+
+    async def fake_create_chat_completion(client, messages, model):
+        prompts.append(messages[-1]["content"])
+        message = SimpleNamespace(content="alpha, beta")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    monkeypatch.setattr(extract_keywords_service, "_create_chat_completion", fake_create_chat_completion)
+    monkeypatch.setattr(extract_keywords_service, "get_groq_client", lambda: None)
+    cache = extract_keywords_service._KEYWORD_CACHE
+    monkeypatch.setattr(cache, "_entries", type(cache._entries)())
+    return prompts
+
+
+def extract_keywords(*words):
+    image_text = {"extracted_info": [
+        {"word": word, "x": 10, "y": 20, "width": 30, "height": 12} for word in words
+    ]}
+    config = SimpleNamespace(parameters=["word", "x", "y", "width", "height"], model="model")
+    return asyncio.run(KeywordExtractor(image_text, config)._extract_keywords())
+
+
+def test_single_distinct_word_skips_groq(groq_prompts):
+    assert extract_keywords("The", "NASA", "nasa") == ["NASA"]
+    assert groq_prompts == []
+
+
+def test_stopwords_only_yield_no_keywords(groq_prompts):
+    assert extract_keywords("the", "Of") == []
+    assert groq_prompts == []
+
+
+def test_groq_receives_the_extracted_values_unchanged(groq_prompts):
+    assert extract_keywords("NASA", "Launch", "NASA") == ["alpha", "beta"]
+
+    # Case, repeats and the layout values are sent as OCR produced them
+    assert groq_prompts == [
+        "Extract keywords from: NASA, Launch, NASA, 10, 10, 10, 20, 20, 20, 30, 30, 30, 12, 12, 12"
+    ]
+
+
+def test_repeated_prompts_are_served_from_cache(groq_prompts):
+    extract_keywords("NASA", "Launch")
+    extract_keywords("NASA", "Launch")
+
+    assert len(groq_prompts) == 1
@@ -0,0 +1,101 @@
+import collections
+import io
+import random
+import time
+
+import cv2
+import numpy as np
+import pytesseract
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from app.services import ocr_service
+from input_layer.image_processor import CLAHE_CLIP_LIMIT, CLAHE_TILE_GRID_SIZE, ImageProcessor
+
+WORDS = (
+    "invoice total amount payment account number date customer service order shipping address "
+    "quantity price product description reference balance due tax subtotal delivery company "
+    "phone email website contract agreement signature report summary"
+).split()
+
+# Denoise filters the current one is compared against: the previous default and the
+# cheaper kernels considered for it
+ALTERNATIVE_DENOISERS = {
+    "GaussianBlur 5x5": lambda image: cv2.GaussianBlur(image, (5, 5), 0),
+    "GaussianBlur 3x3": lambda image: cv2.GaussianBlur(image, (3, 3), 0),
+    "boxFilter 3x3": lambda image: cv2.boxFilter(image, -1, (3, 3)),
+}
+
+
+def tesseract_available():
+    if ocr_service.tesserocr is not None:
+        return "eng" in ocr_service.tesserocr.get_languages()[1]
+    try:
+        pytesseract.get_tesseract_version()
+    except pytesseract.TesseractNotFoundError:
+        return False
+    return True
+
+
+def scanned_page(seed, font_size, noise):
+    """
+    Render a page of known words at about 300 DPI, lit unevenly, slightly out of
+    focus, with sensor noise and JPEG compression like an uploaded photo or scan.
+    """
+    rng = random.Random(seed)
+    page = Image.new("L", (1400, 900), 255)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=font_size)
+    truth, y = [], 60
+    while y < page.height - 80:
+        line = [rng.choice(WORDS) for _ in range(rng.randint(4, 7))]
+        draw.text((60, y), " ".join(line), fill=0, font=font)
+        truth += line
+        y += int(font_size * 1.6)
+
+    pixels = np.asarray(page, dtype=np.float32) * np.linspace(0.75, 1.0, page.width, dtype=np.float32)
+    pixels = cv2.GaussianBlur(pixels, (3, 3), 0.8)
+    pixels += np.random.default_rng(seed).normal(0, noise, pixels.shape).astype(np.float32)
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, "JPEG", quality=80)
+    return Image.open(buffer), truth
+
+
+def ocr_recall_and_time(preprocess, page, truth):
+    """Binarize and OCR like ImageTextExtractor; return the share of words found and the seconds spent."""
+    start = time.perf_counter()
+    image = preprocess(page)
+    binarized = cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+    data = ocr_service._image_to_data(binarized)
+    elapsed = time.perf_counter() - start
+
+    found = collections.Counter(
+        text.strip().lower() for text, conf in zip(data["text"], data["conf"]) if int(conf) > 0 and text.strip()
+    )
+    return sum((found & collections.Counter(truth)).values()) / len(truth), elapsed
+
+
+@pytest.mark.skipif(not tesseract_available(), reason="Tesseract with English data is not installed")
+def test_denoise_filter_beats_the_alternatives_on_ocr_accuracy_and_time():
+    try:
+        pages = [scanned_page(seed, 28, noise) for seed, noise in ((0, 0), (1, 1))]
+    except TypeError:  # Pillow before 10.1 has no sized default font
+        pytest.skip("Pillow cannot render a sized default font")
+
+    def alternative(denoise):
+        clahe = cv2.createCLAHE(clipLimit=CLAHE_CLIP_LIMIT, tileGridSize=CLAHE_TILE_GRID_SIZE)
+        return lambda page: denoise(clahe.apply(np.asarray(page.convert("L"))))
+
+    candidates = {"current": ImageProcessor().preprocess_image}
+    candidates.update({name: alternative(denoise) for name, denoise in ALTERNATIVE_DENOISERS.items()})
+    results = {}
+    for name, preprocess in candidates.items():
+        measured = [ocr_recall_and_time(preprocess, page, truth) for page, truth in pages]
+        results[name] = (np.mean([recall for recall, _ in measured]), sum(seconds for _, seconds in measured))
+        print(f"{name:17s} recall {results[name][0]:.3f}  time {results[name][1]:.2f} s")
+
+    recall, seconds = results["current"]
+    for name in ALTERNATIVE_DENOISERS:
+        assert recall >= results[name][0] - 0.02, name
+    # Less speckle left after binarization also makes Tesseract faster than the previous default
+    assert seconds <= results["GaussianBlur 5x5"][1] * 1.1
@@ -0,0 +1,18 @@
+import logging
+
+import pytest
+
+from app.configs.logging_config import _log_level
+
+
+@pytest.mark.parametrize(
+    "name, level",
+    [("info", logging.INFO), ("DEBUG", logging.DEBUG), (" warning ", logging.WARNING), ("trace", logging.DEBUG)],
+)
+def test_known_level_names_resolve(name, level):
+    assert _log_level(name) == level
+
+
+@pytest.mark.parametrize("name", ["verbose", "", "Level 5"])
+def test_unknown_level_names_resolve_to_none(name):
+    assert _log_level(name) is None
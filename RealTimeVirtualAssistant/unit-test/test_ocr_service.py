@@ -0,0 +1,90 @@
+import asyncio
+
+import numpy as np
+
+from app.services import ocr_service
+from app.services.ocr_service import MIN_STRIP_HEIGHT, STRIP_OVERLAP, _image_to_data_in_strips, run_ocr
+
+# Words on a 3-strip page as (top, height); the second and third overlap strip boundaries
+WORDS = [(100, 10), (395, 10), (790, 10), (1100, 10)]
+WORD_HEIGHT = 10
+
+
+def fake_image_to_data(strip):
+    """Report every word lying fully inside the strip, in strip coordinates, as block 1."""
+    origin, end = int(strip[0, 0]), int(strip[-1, 0]) + 1
+    rows = [(top, height) for top, height in WORDS if origin <= top and top + height <= end]
+    return {
+        "block_num": [1] * len(rows),
+        "top": [top - origin for top, _ in rows],
+        "height": [height for _, height in rows],
+        "left": [0] * len(rows),
+        "text": [f"w{top}" for top, _ in rows],
+    }
+
+
+def page(height):
+    # Each pixel holds its row index, so the fake can tell where a strip starts
+    return np.repeat(np.arange(height, dtype=np.int32)[:, None], 4, axis=1)
+
+
+def test_strips_report_each_word_once_in_page_coordinates(monkeypatch):
+    monkeypatch.setattr(ocr_service, "_image_to_data", fake_image_to_data)
+
+    data = _image_to_data_in_strips(page(3 * MIN_STRIP_HEIGHT), strips=3)
+
+    assert data["text"] == ["w100", "w395", "w790", "w1100"]
+    assert data["top"] == [100, 395, 790, 1100]
+
+
+def test_block_numbers_are_unique_across_strips(monkeypatch):
+    monkeypatch.setattr(ocr_service, "_image_to_data", fake_image_to_data)
+
+    data = _image_to_data_in_strips(page(3 * MIN_STRIP_HEIGHT), strips=3)
+
+    # w100 is in the first strip, w395 and w790 in the second, w1100 in the third
+    assert data["block_num"] == [1, 2, 2, 3]
+
+
+def test_overlap_words_are_seen_by_both_strips(monkeypatch):
+    seen = []
+
+    def recording_image_to_data(strip):
+        data = fake_image_to_data(strip)
+        seen.extend(data["text"])
+        return data
+
+    monkeypatch.setattr(ocr_service, "_image_to_data", recording_image_to_data)
+
+    _image_to_data_in_strips(page(3 * MIN_STRIP_HEIGHT), strips=3)
+
+    assert STRIP_OVERLAP >= WORD_HEIGHT
+    assert sorted(seen) == sorted(["w100", "w395", "w395", "w790", "w790", "w1100"])
+
+
+def test_short_pages_are_not_split(monkeypatch):
+    calls = []
+
+    def recording_image_to_data(image):
+        calls.append(image.shape)
+        return fake_image_to_data(image)
+
+    monkeypatch.setattr(ocr_service, "_image_to_data", recording_image_to_data)
+
+    _image_to_data_in_strips(page(MIN_STRIP_HEIGHT + 1), strips=4)
+
+    assert calls == [(MIN_STRIP_HEIGHT + 1, 4)]
+
+
+def test_concurrent_jobs_share_the_strips(monkeypatch):
+    monkeypatch.setattr(ocr_service, "OCR_STRIPS", 4)
+    monkeypatch.setattr(ocr_service, "ocr_worker", lambda image_bytes, strips: strips)
+    # None runs the fake worker on the event loop's default executor
+    monkeypatch.setattr(ocr_service, "get_ocr_executor", lambda: None)
+
+    async def run_alone_then_together():
+        alone = await run_ocr(b"page")
+        together = await asyncio.gather(run_ocr(b"page"), run_ocr(b"page"), run_ocr(b"page"))
+        return alone, together
+
+    assert asyncio.run(run_alone_then_together()) == (4, [4, 2, 1])
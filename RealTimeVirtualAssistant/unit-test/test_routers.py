@@ -0,0 +1,92 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import routers
+
+EXTRACTED = {"word": ["hello"], "x": [0], "y": [0], "width": [10], "height": [10]}
+
+
+class FakeConfiguration:
+    def load_config(self):
+        pass
+
+
+class FakeKeywordExtractor:
+    def __init__(self, extracted_data, config):
+        pass
+
+    async def _extract_keywords(self):
+        return ["hello"]
+
+
+async def fake_run_ocr(image_bytes):
+    return EXTRACTED
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(routers, "run_ocr", fake_run_ocr)
+    monkeypatch.setattr(routers, "ConfigurationManagerForKeywords", FakeConfiguration)
+    monkeypatch.setattr(routers, "KeywordExtractor", FakeKeywordExtractor)
+    for cache in (routers._OCR_CACHE, routers._EXTRACTED_TEXT_CACHE):
+        monkeypatch.setattr(cache, "_entries", type(cache._entries)())
+    app = FastAPI()
+    app.include_router(routers.ocr_router)
+    return TestClient(app)
+
+
+def upload(client, filename, content_type, content=b"image bytes"):
+    return client.post(
+        "/upload-image-with-query",
+        files={"file": (filename, content, content_type)},
+        data={"query": "what is this?"},
+    ).json()
+
+
+@pytest.mark.parametrize("content_type", ["image/jpeg", "image/png", "image/tiff"])
+def test_standard_image_types_are_accepted(client, content_type):
+    assert upload(client, "page", content_type)["keywords"] == ["hello"]
+
+
+@pytest.mark.parametrize(
+    "filename, content_type",
+    [
+        ("page.jpg", "image/jpg"),
+        ("page.png", "image/x-png"),
+        ("page.JPEG", "image/pjpeg"),
+        ("page.bmp", "image/x-ms-bmp"),
+        ("page.png", "application/octet-stream"),
+    ],
+)
+def test_non_standard_types_fall_back_to_the_extension(client, filename, content_type):
+    response = upload(client, filename, content_type)
+
+    assert response["image_text"] == EXTRACTED
+    assert response["query"] == "what is this?"
+
+
+@pytest.mark.parametrize(
+    "filename, content_type",
+    [("notes.txt", "text/plain"), ("page", "application/octet-stream"), ("archive.png.zip", "application/zip")],
+)
+def test_other_files_are_rejected(client, filename, content_type):
+    assert upload(client, filename, content_type) == {
+        "error": "Unsupported file format. Please upload an image."
+    }
+
+
+def test_configuration_errors_are_reported_before_ocr(client, monkeypatch):
+    class BrokenConfiguration:
+        def load_config(self):
+            raise RuntimeError("no API key")
+
+    async def unexpected_run_ocr(image_bytes):
+        raise AssertionError("OCR must not run without a keyword configuration")
+
+    monkeypatch.setattr(routers, "ConfigurationManagerForKeywords", BrokenConfiguration)
+    monkeypatch.setattr(routers, "run_ocr", unexpected_run_ocr)
+
+    assert upload(client, "page.png", "image/png") == {
+        "error": "Error loading keyword extraction configuration."
+    }